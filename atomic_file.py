@@ -0,0 +1,24 @@
+import os
+
+
+def write_file_atomic(path, data, sync=True):
+    """Write bytes to path through a temporary file that is renamed over it
+
+    With sync, a crash at any point leaves either the old file or the complete
+    new one, never a truncated file. Bulk writers can pass sync=False and
+    call os.sync() once at the end instead.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    # Make the rename itself durable; Windows cannot open directories for this
+    if sync and hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
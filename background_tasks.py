@@ -0,0 +1,245 @@
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task's work function once the task has been cancelled"""
+
+
+class Task:
+    """Handle for one piece of work submitted to a TaskRunner
+
+    The work function receives the task and may call partial() to stream
+    results and progress() to report how far it got. Every callback runs on
+    the UI thread through the runner's dispatch function, and none of them
+    runs once the task is cancelled.
+    """
+
+    def __init__(self, runner, on_result=None, on_error=None, on_partial=None, on_progress=None):
+        self._runner = runner
+        self._on_result = on_result
+        self._on_error = on_error
+        self._on_partial = on_partial
+        self._on_progress = on_progress
+        self._cancelled = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stop delivering callbacks and let the work function bail out early"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check(self):
+        """Raise TaskCancelled if the task was cancelled"""
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def partial(self, items):
+        """Send a batch of partial results to the UI thread"""
+        self.check()
+        if self._on_partial:
+            self._deliver(self._on_partial, items)
+
+    def progress(self, done, total):
+        """Report progress to the UI thread"""
+        self.check()
+        if self._on_progress:
+            self._deliver(self._on_progress, done, total)
+
+    def _deliver(self, callback, *args):
+        def run():
+            # Cancelling between scheduling and running must still drop the callback
+            if not self.cancelled:
+                callback(*args)
+        self._runner.dispatch(run)
+
+    def _finished(self, future):
+        if self.cancelled or future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            if self._on_result:
+                self._deliver(self._on_result, future.result())
+        elif not isinstance(error, TaskCancelled) and self._on_error:
+            self._deliver(self._on_error, error)
+
+
+class TaskRunner:
+    """Runs slow work off the UI thread and hands results back to it
+
+    I/O-bound work runs on a small thread pool. Aggregation that only needs
+    picklable arguments can go to a process pool instead, which is skipped
+    (and the thread pool used) when process_workers is 0, e.g. on Android.
+    """
+
+    def __init__(self, dispatch, io_workers=2, process_workers=0):
+        """
+        Args:
+            dispatch: Function that runs a callable on the UI thread,
+                      e.g. one wrapping Clock.schedule_once
+            io_workers (int): Threads for I/O-bound work
+            process_workers (int): Processes for aggregation, 0 to disable
+        """
+        self.dispatch = dispatch
+        self._threads = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='task')
+        self._process_workers = process_workers
+        self._processes = None
+
+    def submit(self, work, *args, on_result=None, on_error=None, on_partial=None, on_progress=None):
+        """Run work(task, *args) on the thread pool
+
+        Returns:
+            The Task, which can be cancelled
+        """
+        task = Task(self, on_result, on_error, on_partial, on_progress)
+        task.future = self._threads.submit(work, task, *args)
+        task.future.add_done_callback(task._finished)
+        return task
+
+    def submit_process(self, func, *args, on_result=None, on_error=None):
+        """Run func(*args) on the process pool, or the thread pool if it is disabled
+
+        func and its arguments must be picklable, so func has to be a module-level function.
+
+        Returns:
+            The Task, which can be cancelled
+        """
+        if not self._process_workers:
+            return self.submit(lambda task: func(*args), on_result=on_result, on_error=on_error)
+        if self._processes is None:
+            # Spawn rather than fork, a forked copy of a running UI process is not safe to use
+            self._processes = ProcessPoolExecutor(max_workers=self._process_workers,
+                                                  mp_context=multiprocessing.get_context('spawn'))
+        task = Task(self, on_result, on_error)
+        task.future = self._processes.submit(func, *args)
+        task.future.add_done_callback(task._finished)
+        return task
+
+    def shutdown(self):
+        """Stop the pools without waiting for running work"""
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+
+class SaveQueue:
+    """Runs saves one after another on a background thread, retrying failed ones
+
+    A save is a function returning its result and raising on failure. Saves
+    run one at a time in submission order. A save that raises one of the
+    retry_on errors, by default OSError such as a full or unmounted disk, is
+    retried after each of retry_delays seconds in turn, then every last
+    delay until it succeeds; any other error cannot be fixed by waiting and
+    ends the save. Callbacks run on the UI thread through the dispatch
+    function: on_saved(result) once, and on_failed(error, retry_in) after
+    every failed attempt, with retry_in None once the save is given up.
+    """
+
+    def __init__(self, dispatch, retry_delays=(2, 10, 60), retry_on=(OSError,)):
+        self.dispatch = dispatch
+        self.retry_delays = retry_delays
+        self.retry_on = retry_on
+        self._queue = queue.Queue()
+        self._retries = []  # [due time, attempts, save, on_saved, on_failed]
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._running = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='save', daemon=True)
+        self._thread.start()
+
+    def submit(self, save, on_saved=None, on_failed=None):
+        """Queue save() to run on the save thread"""
+        with self._lock:
+            self._running += 1
+        self._queue.put([0, 0, save, on_saved, on_failed])
+
+    def pending(self):
+        """Number of saves not yet done, including those waiting for a retry"""
+        with self._lock:
+            return self._running
+
+    def retry_now(self):
+        """Run every save waiting for a retry straight away, e.g. before the app is paused"""
+        with self._lock:
+            retries, self._retries = self._retries, []
+        for job in retries:
+            self._queue.put(job)
+
+    def wait(self, timeout=None):
+        """Block until every queued save is done or waiting for a retry
+
+        Returns:
+            True if no save is left running or waiting
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._running > len(self._retries):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._idle.wait(remaining)
+            return self._running == 0
+
+    def stop(self):
+        """Let the save thread finish its current save and exit"""
+        self._stopped = True
+        self._queue.put(None)
+
+    def _next_timeout(self):
+        with self._lock:
+            if not self._retries:
+                return None
+            return max(0, min(job[0] for job in self._retries) - time.monotonic())
+
+    def _take_due_retries(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [job for job in self._retries if job[0] <= now]
+            self._retries = [job for job in self._retries if job[0] > now]
+        return due
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                job = self._queue.get(timeout=self._next_timeout())
+            except queue.Empty:
+                job = None
+            else:
+                if job is None:
+                    continue  # Woken up by stop()
+            for job in ([job] if job else []) + self._take_due_retries():
+                self._attempt(job)
+
+    def _attempt(self, job):
+        _, attempts, save, on_saved, on_failed = job
+        error = retry_in = None
+        try:
+            result = save()
+        except self.retry_on as e:
+            error = str(e) or type(e).__name__
+            retry_in = self.retry_delays[min(attempts, len(self.retry_delays) - 1)]
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        with self._idle:
+            if retry_in is None:
+                self._running -= 1
+            else:
+                self._retries.append([time.monotonic() + retry_in, attempts + 1, save, on_saved, on_failed])
+            self._idle.notify_all()
+
+        if error is None:
+            if on_saved:
+                self.dispatch(lambda: on_saved(result))
+        elif on_failed:
+            self.dispatch(lambda: on_failed(error, retry_in))
@@ -0,0 +1,475 @@
+from collections import namedtuple
+from collections.abc import Mapping
+from game_journal import OP_HIT, OP_UNDO_MARK, OP_UNDO_THROW, OP_SWITCH, OP_REDO, OP_REWIND
+
+
+class PlayerState:
+    """Immutable per-player state; changing a player creates a new PlayerState
+
+    Sector counts are tuples indexed by sector offset (lowest sector first,
+    Bull last) so a hit copies one small tuple instead of a dict.
+    """
+    __slots__ = (
+        'score',
+        'sectors',  # Marks per sector offset
+        'total_marks',  # Sum of sectors, so MPR never has to add them up
+        'marks_this_round',  # Total marks made this round
+        'sectors_hit_count',  # Number of different sectors hit in current round
+        'round_hits',  # Hits per sector offset in current round
+        'mpr',
+        'rounds',
+    )
+
+    def __init__(self, score, sectors, total_marks, marks_this_round, sectors_hit_count, round_hits, mpr, rounds):
+        self.score = score
+        self.sectors = sectors
+        self.total_marks = total_marks
+        self.marks_this_round = marks_this_round
+        self.sectors_hit_count = sectors_hit_count
+        self.round_hits = round_hits
+        self.mpr = mpr
+        self.rounds = rounds
+
+
+# Immutable game state. Every change creates a new GameState that shares all
+# unchanged parts with its predecessor, so older positions stay valid forever.
+GameState = namedtuple('GameState', [
+    'current_player',
+    'game_over',
+    'players',  # Tuple of two PlayerState
+    'history',  # Finished rounds as a linked list of (round marks, previous node), or None
+    'round_count',  # Number of finished rounds
+    'current_round',  # Tuple of marks in the current round
+    'before_mark',  # State before the last mark of the current round, or None
+    'before_switch',  # State at the end of the previous round, before switching, or None
+])
+
+
+# What differs between two game states: the indices of players whose state changed,
+# a {player index: set of sector names} dict of changed marks or current-round hits,
+# and whether the current player changed
+StateChanges = namedtuple('StateChanges', ['players', 'sectors', 'switched'])
+
+
+class SectorCounts(Mapping):
+    """Read-only mapping from sector names to a tuple of per-sector counts"""
+    __slots__ = ('_index', '_counts')
+
+    def __init__(self, index, counts):
+        self._index = index
+        self._counts = counts
+
+    def __getitem__(self, sector):
+        return self._counts[self._index[sector]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def values(self):
+        return self._counts
+
+
+class Player:
+    """View of one player in the game's current state"""
+
+    def __init__(self, game, index, name):
+        self._game = game
+        self._index = index
+        self.name = name
+
+    @property
+    def _state(self):
+        return self._game._state.players[self._index]
+
+    @property
+    def score(self):
+        return self._state.score
+
+    @property
+    def sectors(self):
+        return SectorCounts(self._game.sector_index, self._state.sectors)
+
+    @property
+    def marks_this_round(self):
+        return self._state.marks_this_round
+
+    @property
+    def sectors_hit_this_round(self):
+        """Sectors hit in current round"""
+        return frozenset(sector for sector, hits in self.current_round_sector_hits.items() if hits)
+
+    @property
+    def current_round_sector_hits(self):
+        return SectorCounts(self._game.sector_index, self._state.round_hits)
+
+    @property
+    def mpr(self):
+        return self._state.mpr
+
+    @property
+    def rounds(self):
+        return self._state.rounds
+
+    def calculate_mpr(self):
+        """Calculate Marks Per Round based on total marks in sectors"""
+        return _calculate_mpr(self._state.total_marks, self._state.rounds)
+
+
+def _calculate_mpr(total_marks, rounds):
+    if rounds == 0:
+        return 1.0
+    return total_marks / rounds
+
+
+class CricketGame:
+    def __init__(self, player1_name, player2_name, highest_sector, lowest_sector, bull_points):
+        self.players = [Player(self, 0, player1_name), Player(self, 1, player2_name)]
+        self.highest_sector = highest_sector
+        self.lowest_sector = lowest_sector
+        self.bull_points = bull_points
+
+        # Sector name to offset in the per-player count tuples, Bull last
+        self.sector_index = {str(i): i - lowest_sector for i in range(lowest_sector, highest_sector + 1)}
+        self.sector_index['Bull'] = len(self.sector_index)
+        self._sector_names = tuple(self.sector_index)
+        # Points per sector offset; Bull hits always record bull_points, see add_hit
+        self._sector_points = tuple(range(lowest_sector, highest_sector + 1)) + (bull_points,)
+        self._no_hits = (0,) * len(self.sector_index)
+
+        # Initialize sectors for both players
+        player_state = PlayerState(0, self._no_hits, 0, 0, 0, self._no_hits, 0.0, 1)
+        self._state = GameState(
+            current_player=0,
+            game_over=False,
+            players=(player_state, player_state),
+            history=None,
+            round_count=0,
+            current_round=(),
+            before_mark=None,
+            before_switch=None
+        )
+        # States left by undo, most recent last, for redo()
+        self._redo = []
+        # End-of-round states of the current position's history indexed by round_count,
+        # so rewind_rounds() jumps straight to one; None until rebuilt after a restore or fork
+        self._round_ends = []
+
+        # Optional MarkJournal mirroring every state change for crash recovery
+        self.journal = None
+
+    @property
+    def current_player(self):
+        return self._state.current_player
+
+    @property
+    def game_over(self):
+        return self._state.game_over
+
+    @property
+    def mark_history(self):
+        """Finished rounds as lists of marks, oldest first"""
+        rounds = []
+        node = self._state.history
+        while node is not None:
+            round_marks, node = node
+            rounds.append(list(round_marks))
+        rounds.reverse()
+        return rounds
+
+    @property
+    def current_round_marks(self):
+        """Finished rounds followed by the current round, as lists of marks"""
+        return self.mark_history + [list(self._state.current_round)]
+
+    def can_undo_mark(self):
+        return bool(self._state.current_round)
+
+    def can_undo_throw(self):
+        return self._state.before_switch is not None
+
+    def _set_state(self, state):
+        """Move to a new state reached by playing, which clears redo"""
+        self._state = state
+        self._redo.clear()
+
+    def switch_player(self):
+        state = self._state
+        players = list(state.players)
+        leaving = state.current_player
+        incoming = 1 - leaving
+
+        # Increment rounds for the leaving player
+        p = players[leaving]
+        players[leaving] = PlayerState(p.score, p.sectors, p.total_marks, p.marks_this_round,
+                                       p.sectors_hit_count, p.round_hits, p.mpr, p.rounds + 1)
+
+        # Reset current round state for the new player
+        p = players[incoming]
+        players[incoming] = PlayerState(p.score, p.sectors, p.total_marks, 0, 0, self._no_hits,
+                                        _calculate_mpr(p.total_marks, p.rounds), p.rounds)
+
+        # Save current round marks to history and start new round
+        if self._round_ends is not None:
+            del self._round_ends[state.round_count:]
+            self._round_ends.append(state)
+        self._set_state(GameState(
+            current_player=incoming,
+            game_over=state.game_over,
+            players=tuple(players),
+            history=(state.current_round, state.history),  # Always store the round, even if empty
+            round_count=state.round_count + 1,
+            current_round=(),
+            before_mark=None,
+            before_switch=state
+        ))
+
+        if self.journal:
+            self.journal.record(OP_SWITCH)
+            self.journal.flush()  # A finished round is worth a write
+
+    def add_hit(self, sector, hits=1):
+        state = self._state
+        if state.game_over:
+            return False
+
+        current = state.players[state.current_player]
+        opponent = state.players[1 - state.current_player]
+        idx = self.sector_index[sector]
+        marks = current.sectors[idx]
+
+        # Check if sector is closed (both players have 3 marks)
+        if marks >= 3 and opponent.sectors[idx] >= 3:
+            return False  # Don't count hits on closed sectors
+
+        # Check if player has already used 9 marks this round
+        if current.marks_this_round >= 9:
+            return False
+
+        # Check if we've reached the limit of 3 sectors per turn
+        round_hits = current.round_hits[idx]
+        if current.sectors_hit_count >= 3 and not round_hits:
+            return False
+
+        # Record the mark before making changes
+        was_scoring = marks >= 3
+        mark_info = {
+            'player': state.current_player,
+            'sector': sector,
+            'was_scoring': was_scoring,
+            'points': self.bull_points if sector == 'Bull' else self._sector_points[idx] if was_scoring else 0
+        }
+
+        # Update hits for the sector; a hit on a sector the opponent closed never gets here
+        sectors = current.sectors[:idx] + (marks + 1,) + current.sectors[idx + 1:]
+        total_marks = current.total_marks + 1
+        score = current.score
+        if was_scoring:
+            # Add points if sector is open by current player and not closed by opponent
+            score += self._sector_points[idx]
+
+        players = list(state.players)
+        players[state.current_player] = PlayerState(
+            score,
+            sectors,
+            total_marks,
+            current.marks_this_round + 1,
+            current.sectors_hit_count + (not round_hits),
+            current.round_hits[:idx] + (round_hits + 1,) + current.round_hits[idx + 1:],
+            _calculate_mpr(total_marks, current.rounds),  # Update MPR after the hit
+            current.rounds
+        )
+        self._set_state(state._replace(
+            players=tuple(players),
+            current_round=state.current_round + (mark_info,),
+            before_mark=state
+        ))
+
+        if self.journal:
+            self.journal.record(OP_HIT, sector)
+        return True
+
+    def undo_last_mark(self):
+        """Return to the state before the last mark of the current round"""
+        state = self._state
+        if not state.current_round:
+            return False
+        self._redo.append(state)
+        self._state = state.before_mark
+        if self.journal:
+            self.journal.record(OP_UNDO_MARK)
+        return True
+
+    def undo_last_throw(self):
+        """Undo the current player's entire round and restore previous player's round
+
+        Returns to the end of the previous round, just before players switched,
+        with all of the previous player's marks from that round in place.
+        """
+        state = self._state
+        if state.before_switch is None:
+            return False
+        self._redo.append(state)
+        self._state = state.before_switch
+        if self.journal:
+            self.journal.record(OP_UNDO_THROW)
+        return True
+
+    def redo(self):
+        """Reapply the most recently undone mark or round"""
+        if not self._redo:
+            return False
+        self._state = self._redo.pop()
+        if self.journal:
+            self.journal.record(OP_REDO)
+        return True
+
+    def rewind_rounds(self, count):
+        """Jump back to the end of the round `count` rounds ago, before switching
+
+        Constant time: the end of every round is looked up by its number. The
+        positions jumped over can be reached again with redo().
+        """
+        state = self._state
+        if count <= 0 or state.before_switch is None:
+            return False
+        if self._round_ends is None:
+            # Rebuilt once after a restore or fork, by walking back through the rounds
+            self._round_ends = []
+            node = state.before_switch
+            while node is not None:
+                self._round_ends.append(node)
+                node = node.before_switch
+            self._round_ends.reverse()
+        self._redo.append(state)
+        self._state = self._round_ends[max(state.round_count - count, 0)]
+        if self.journal:
+            self.journal.record(OP_REWIND, count)
+        return True
+
+    def fork(self):
+        """Create an independent game continuing from the current position
+
+        The fork shares all existing state with this game, so forking is
+        constant time; changes to either game never affect the other.
+        """
+        game = CricketGame.__new__(CricketGame)
+        game.players = [Player(game, idx, player.name) for idx, player in enumerate(self.players)]
+        game.highest_sector = self.highest_sector
+        game.lowest_sector = self.lowest_sector
+        game.bull_points = self.bull_points
+        game.sector_index = self.sector_index
+        game._sector_names = self._sector_names
+        game._sector_points = self._sector_points
+        game._no_hits = self._no_hits
+        game._state = self._state
+        game._redo = list(self._redo)
+        game._round_ends = None
+        game.journal = None
+        return game
+
+    def snapshot(self):
+        """Capture the game state so restore() can return to it later"""
+        return self._state
+
+    def restore(self, snapshot):
+        """Return the game to a state captured by snapshot()
+
+        A journaled game has its journal rewritten to reach the restored
+        position, which costs one line per mark.
+        """
+        self._state = snapshot
+        self._redo.clear()
+        self._round_ends = None
+        if self.journal:
+            self.journal.rewrite(self)
+
+    def changes_since(self, snapshot):
+        """Find what changed since a state captured by snapshot()
+
+        Unchanged parts of the state are shared, so this only compares the
+        sectors of players whose state was replaced.
+
+        Args:
+            snapshot: Earlier snapshot() of this game, or None to report everything
+
+        Returns:
+            StateChanges
+        """
+        state = self._state
+        if snapshot is None:
+            everything = set(self._sector_names)
+            return StateChanges({0, 1}, {0: everything, 1: set(everything)}, True)
+
+        players = set()
+        sectors = {0: set(), 1: set()}
+        for idx, (old, new) in enumerate(zip(snapshot.players, state.players)):
+            if old is new:
+                continue
+            players.add(idx)
+            if old.sectors is new.sectors and old.round_hits is new.round_hits:
+                continue
+            for offset, counts in enumerate(zip(old.sectors, new.sectors, old.round_hits, new.round_hits)):
+                if counts[0] != counts[1] or counts[2] != counts[3]:
+                    sectors[idx].add(self._sector_names[offset])
+        return StateChanges(players, sectors, snapshot.current_player != state.current_player)
+
+    def check_game_over(self):
+        players = self._state.players
+        for player in players:
+            # Check if all sectors are closed (3 marks by both players)
+            all_closed = all(hits >= 3 for hits in player.sectors)
+            if all_closed and player.score >= max(p.score for p in players):
+                self._state = self._state._replace(game_over=True)
+                return True
+        return False
+
+    def get_winner_index(self):
+        """Get the index of the winner"""
+        if not self.game_over:
+            raise ValueError("Game is not over")
+
+        if self.players[0].score == self.players[1].score:
+            p1_closed_sectors = len([hits for hits in self.players[0].sectors.values() if hits >= 3])
+            p2_closed_sectors = len([hits for hits in self.players[1].sectors.values() if hits >= 3])
+            if p1_closed_sectors > p2_closed_sectors:
+                return 0
+            elif p1_closed_sectors < p2_closed_sectors:
+                return 1
+            else:
+                raise ValueError("Game is a draw")
+
+        elif self.players[0].score > self.players[1].score:
+            return 0
+        else:
+            return 1
+
+
+def replay_game(game_data):
+    """Rebuild a game from saved game data by replaying it through the rules
+
+    Players switch after every saved round, as GameScreen.next_player does,
+    so a completed game ends in the same state it was saved in.
+
+    Returns:
+        Tuple of (game, rejected) where rejected lists (round index, mark index)
+        of saved marks the rules did not accept
+    """
+    settings = game_data['settings']
+    game = CricketGame(
+        game_data['players'][0]['name'],
+        game_data['players'][1]['name'],
+        settings['highest_sector'],
+        settings['lowest_sector'],
+        settings['bull_points']
+    )
+    rejected = []
+    for round_idx, round_marks in enumerate(game_data['history']):
+        for mark_idx, mark in enumerate(round_marks):
+            if not game.add_hit(mark['sector']):
+                rejected.append((round_idx, mark_idx))
+        game.switch_player()
+        game.check_game_over()
+    return game, rejected
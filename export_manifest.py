@@ -0,0 +1,75 @@
+import os
+import json
+import hashlib
+from atomic_file import write_file_atomic
+
+# Bump when the layout of the persisted manifest changes; older manifests are ignored
+EXPORT_MANIFEST_VERSION = 1
+
+
+def file_hash(path):
+    """Get the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExportManifest:
+    """Content hashes of the history files as of the last export
+
+    Each record keeps the file's size and modification time next to its hash,
+    so files that were not touched since are recognised without reading them.
+    """
+
+    def __init__(self, index_dir):
+        self.path = os.path.join(index_dir, 'export_manifest.json')
+
+    def load(self):
+        """Return the stored {filename: record} dict, empty if there is no usable manifest"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != EXPORT_MANIFEST_VERSION:
+            return {}
+        return data['files']
+
+    def save(self, files):
+        """Write the manifest atomically so a crash never leaves a half-written one"""
+        write_file_atomic(self.path, json.dumps({'version': EXPORT_MANIFEST_VERSION, 'files': files}).encode('utf-8'))
+
+    def invalidate(self):
+        """Forget previous exports so the next delta export includes every file"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def scan(self, base_dir, filenames, previous, progress=None):
+        """Build manifest records for files in base_dir
+
+        Args:
+            base_dir (str): Directory holding the files
+            filenames (list): Files to describe
+            previous (dict): Records from load(), reused for unchanged files
+            progress: Optional function called with (done, total)
+
+        Returns:
+            Dict of {filename: record} for the given files
+        """
+        files = {}
+        for i, name in enumerate(filenames):
+            if progress:
+                progress(i, len(filenames))
+            st = os.stat(os.path.join(base_dir, name))
+            old = previous.get(name)
+            if old and old['size'] == st.st_size and old['mtime'] == st.st_mtime_ns:
+                files[name] = old
+            else:
+                files[name] = {
+                    'size': st.st_size,
+                    'mtime': st.st_mtime_ns,
+                    'hash': file_hash(os.path.join(base_dir, name))
+                }
+        return files
@@ -0,0 +1,77 @@
+import copy
+import threading
+from collections import OrderedDict
+
+# Rough heap bytes of a parsed game: the dicts of the header plus one small dict per mark
+GAME_BASE_COST = 1000
+MARK_COST = 160
+
+
+def game_data_cost(game_data):
+    """Estimate the memory a parsed game takes"""
+    history = game_data.get('history') or []
+    return GAME_BASE_COST + MARK_COST * sum(len(round_marks) for round_marks in history)
+
+
+def copy_game_data(game_data):
+    """Copy parsed game data, a good deal faster than copy.deepcopy for the usual layout"""
+    result = {}
+    for key, value in game_data.items():
+        if key == 'history' and isinstance(value, list):
+            result[key] = [[dict(mark) for mark in round_marks] for round_marks in value]
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+
+class GameCache:
+    """Bounded LRU cache of parsed game files
+
+    Entries are keyed by path and remember the file's modification time and
+    size, so a file changed on disk is parsed again instead of served stale.
+    The least recently used games are dropped once the estimated memory of
+    all entries exceeds max_bytes. Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path: (stamp, game_data, cost)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, stamp):
+        """Return the cached game for path if it was cached with the same stamp, else None"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            if entry[0] != stamp:
+                self._remove(path)
+                return None
+            self._entries.move_to_end(path)
+            return entry[1]
+
+    def put(self, path, stamp, game_data, cost):
+        with self._lock:
+            self._remove(path)
+            if cost > self.max_bytes:
+                return
+            self._entries[path] = (stamp, game_data, cost)
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, path):
+        """Forget the game at path, e.g. because the file was deleted or replaced"""
+        with self._lock:
+            self._remove(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry[2]
@@ -1,14 +1,338 @@
 import os
 import json
 from datetime import datetime
-from kivy.utils import platform
-from kivy.storage.jsonstore import JsonStore
 import zipfile
+import gzip
+import zlib
+import struct
+import sys
+from array import array
+import copy
+import hashlib
+import threading
+import functools
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from player_stats import (PlayerStatsIndex, add_game_stats, remove_game_stats, merge_player_stats, summarize_player_stats,
+                          stats_events, aggregate_player_stats)
+from export_manifest import ExportManifest
+from mark_dataset import MarkDataset
+from game_cache import GameCache, copy_game_data, game_data_cost
+from perf_metrics import metrics
+from atomic_file import write_file_atomic
+from background_tasks import TaskCancelled
+from history_catalog import (HistoryCatalog, GAME_FILE_EXTENSIONS, is_game_file, game_file_stem, make_catalog_entry,
+                             parse_filename_timestamp)
+
+# Detect Android the way Kivy does, so this module runs headless without importing Kivy
+platform = 'android' if 'ANDROID_ARGUMENT' in os.environ else sys.platform
+
+# Packed binary game files: b'WCG' + format version + JSON header + packed marks
+BINARY_GAME_MAGIC = b'WCG'
+BINARY_GAME_VERSION = 1
+BINARY_GAME_EXTENSION = '.wcg'
+BULL_SECTOR_INDEX = 6
+
+# Game files aggregated per partial result when computing player stats
+STATS_CHUNK_SIZE = 500
+
+
+def encode_game_binary(game_data):
+    """Pack game data into the compact binary format
+
+    Everything except the mark history is stored as a compact JSON header.
+    Each mark is packed into 16 bits: player (1 bit), sector offset from the
+    lowest sector with 6 for Bull (3 bits), scoring flag (1 bit) and points
+    (5 bits). Rounds are stored as one byte holding their mark count.
+
+    Raises:
+        ValueError: If a mark cannot be represented in the packed format
+    """
+    header = {key: value for key, value in game_data.items() if key != 'history'}
+    lowest_sector = game_data['settings']['lowest_sector']
+
+    round_sizes = bytearray()
+    codes = array('H')
+    for round_marks in game_data['history']:
+        if len(round_marks) > 255:
+            raise ValueError("Too many marks in one round")
+        round_sizes.append(len(round_marks))
+        for mark in round_marks:
+            if mark['sector'] == 'Bull':
+                sector_index = BULL_SECTOR_INDEX
+            else:
+                sector_index = int(mark['sector']) - lowest_sector
+            if not 0 <= sector_index <= BULL_SECTOR_INDEX:
+                raise ValueError(f"Sector {mark['sector']} is outside the game window")
+            if mark['player'] not in (0, 1) or not 0 <= mark['points'] < 32:
+                raise ValueError("Mark cannot be packed")
+            codes.append(mark['player'] | sector_index << 1 | bool(mark['was_scoring']) << 4 | mark['points'] << 5)
+
+    if sys.byteorder == 'big':
+        codes.byteswap()
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return b''.join([
+        BINARY_GAME_MAGIC,
+        bytes([BINARY_GAME_VERSION]),
+        struct.pack('<II', len(header_bytes), len(round_sizes)),
+        header_bytes,
+        bytes(round_sizes),
+        codes.tobytes()
+    ])
+
+
+def decode_game_binary(data):
+    """Unpack game data written by encode_game_binary
+
+    Returns the same dictionary layout as a JSON game file.
+
+    Raises:
+        ValueError: If the data is not a supported binary game file
+    """
+    if data[:3] != BINARY_GAME_MAGIC:
+        raise ValueError("Not a binary game file")
+    if data[3] != BINARY_GAME_VERSION:
+        raise ValueError(f"Unsupported binary game format version {data[3]}")
+
+    try:
+        header_len, round_count = struct.unpack_from('<II', data, 4)
+        offset = 12
+        game_data = json.loads(data[offset:offset + header_len].decode('utf-8'))
+        offset += header_len
+        round_sizes = data[offset:offset + round_count]
+        offset += round_count
+        codes = array('H')
+        codes.frombytes(data[offset:])
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Corrupt binary game file: {e}")
+    if sys.byteorder == 'big':
+        codes.byteswap()
+    if len(round_sizes) != round_count or len(codes) != sum(round_sizes):
+        raise ValueError("Corrupt binary game file: truncated mark data")
+
+    # Decode each distinct mark code once, a game only uses a few dozen of them
+    lowest_sector = game_data['settings']['lowest_sector']
+    decoded = {}
+    for code in set(codes):
+        sector_index = code >> 1 & 0x7
+        decoded[code] = {
+            'player': code & 1,
+            'sector': 'Bull' if sector_index == BULL_SECTOR_INDEX else str(lowest_sector + sector_index),
+            'was_scoring': bool(code >> 4 & 1),
+            'points': code >> 5
+        }
+
+    history = []
+    position = 0
+    for size in round_sizes:
+        history.append([decoded[code].copy() for code in codes[position:position + size]])
+        position += size
+    game_data['history'] = history
+    return game_data
+
+
+def encode_game_json(game_data):
+    return json.dumps(game_data, indent=2).encode('utf-8')
+
+
+def encode_game_compact_json(game_data):
+    return json.dumps(game_data, separators=(',', ':')).encode('utf-8')
+
+
+def decode_game_json(data):
+    return json.loads(data.decode('utf-8'))
+
+
+def encode_game_gzip(game_data):
+    # A fixed mtime keeps the bytes, and so the export hashes, the same for the same game
+    return gzip.compress(encode_game_compact_json(game_data), mtime=0)
+
+
+def decode_game_gzip(data):
+    try:
+        return decode_game_json(gzip.decompress(data))
+    except (OSError, EOFError, zlib.error) as e:
+        raise ValueError(f"Corrupt gzip game file: {e}")
+
+
+def encode_game_zlib(game_data):
+    return zlib.compress(encode_game_compact_json(game_data))
+
+
+def decode_game_zlib(data):
+    try:
+        return decode_game_json(zlib.decompress(data))
+    except zlib.error as e:
+        raise ValueError(f"Corrupt zlib game file: {e}")
+
+
+def is_binary_game(data):
+    return data[:3] == BINARY_GAME_MAGIC
+
+
+def is_gzip_stream(data):
+    return data[:2] == b'\x1f\x8b'
+
+
+def is_zlib_stream(data):
+    """Check for a zlib header: deflate method, and the first two bytes a multiple of 31"""
+    return len(data) >= 2 and data[0] & 0x0f == 8 and (data[0] << 8 | data[1]) % 31 == 0
+
+
+# A game file format. matches(data) recognizes the format from a file's first
+# bytes, or is None for formats that are only ever read as plain JSON
+GameCodec = namedtuple('GameCodec', 'name extension encode decode matches')
+
+# Codecs by name, in the order decode_game_data tries them. The content, not
+# the extension, decides how a file is read, so renamed and exported files
+# of any format load the same way
+GAME_CODECS = {}
+
+
+def register_codec(codec):
+    """Add a game file format, readable from then on and selectable as GameHistory.save_format"""
+    GAME_CODECS[codec.name] = codec
+    if codec.extension not in GAME_FILE_EXTENSIONS:
+        GAME_FILE_EXTENSIONS.append(codec.extension)
+
+
+register_codec(GameCodec('binary', BINARY_GAME_EXTENSION, encode_game_binary, decode_game_binary, is_binary_game))
+register_codec(GameCodec('gzip', '.json.gz', encode_game_gzip, decode_game_gzip, is_gzip_stream))
+register_codec(GameCodec('zlib', '.json.zlib', encode_game_zlib, decode_game_zlib, is_zlib_stream))
+register_codec(GameCodec('compact_json', '.json', encode_game_compact_json, decode_game_json, None))
+register_codec(GameCodec('json', '.json', encode_game_json, decode_game_json, None))
+
+
+def decode_game_data(data):
+    """Parse the bytes of a game file in any registered format
+
+    Files no codec recognizes are read as JSON, as all games were before
+    there were other formats.
+
+    Raises:
+        ValueError: If the data cannot be parsed
+    """
+    for codec in GAME_CODECS.values():
+        if codec.matches is not None and codec.matches(data):
+            return codec.decode(data)
+    return decode_game_json(data)
+
+
+def encode_game_data(game_data, fmt):
+    """Serialize game data with the codec named fmt
+
+    Games the codec cannot hold, such as marks outside the packed binary
+    layout, are written as JSON instead.
+
+    Returns:
+        tuple: (file contents, file extension)
+
+    Raises:
+        ValueError: If fmt is not a registered codec
+    """
+    codec = GAME_CODECS.get(fmt)
+    if codec is None:
+        raise ValueError(f"Unknown game file format {fmt!r}")
+    try:
+        return codec.encode(game_data), codec.extension
+    except ValueError:
+        codec = GAME_CODECS['json']
+        return codec.encode(game_data), codec.extension
+
+
+def game_to_data(game, aborted=False):
+    """Build the saved form of a game: players, winner, settings and mark history"""
+    winner = None
+    if not aborted:
+        winner_idx = game.get_winner_index()
+        winner = {'id': winner_idx, 'name': game.players[winner_idx].name, 'score': game.players[winner_idx].score}
+    return {
+        'players': [{'name': p.name, 'score': p.score, 'mpr': p.mpr} for p in game.players[:2]],
+        'winner': winner,  # No winner for aborted games
+        'settings': {
+            'highest_sector': game.highest_sector,
+            'lowest_sector': game.lowest_sector,
+            'bull_points': game.bull_points
+        },
+        'history': [[{'player': mark['player'], 'sector': mark['sector'],
+                      'was_scoring': mark['was_scoring'], 'points': mark['points']}
+                     for mark in round_marks]
+                    for round_marks in game.mark_history]
+    }
+
+
+def game_filename_base(game, timestamp, aborted=False):
+    """Name a game file, without extension, after its rounds, players, MPRs and time"""
+    rounds = int((len(game.mark_history) + 1) / 2)
+    p1, p2 = game.players[:2]
+    prefix = 'aborted_' if aborted else ''
+    return f"{prefix}R{rounds} {p1.name}{{{p1.mpr:.2f}}} vs {p2.name}{{{p2.mpr:.2f}}} on {timestamp}"
+
+
+# A game ready to be written by GameHistory.write_game: its data and the file name and time it is saved under
+PendingGame = namedtuple('PendingGame', 'filename_base game_data timestamp aborted')
+
+
+def prepare_game(game, aborted=False):
+    """Build the saved form of a game once, so every attempt to write it writes the same file
+
+    Raises:
+        ValueError: If a completed game has no winner
+    """
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M')
+    return PendingGame(game_filename_base(game, timestamp, aborted), game_to_data(game, aborted), timestamp, aborted)
+
+
+def _holding_write_lock(method):
+    """Run a GameHistory method that writes game files or indexes under the shared write lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class MetadataStore:
+    """Minimal JSON key/value file, compatible with kivy.storage.jsonstore.JsonStore"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        try:
+            with open(filename, 'r') as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    def exists(self, key):
+        return key in self._data
+
+    def get(self, key):
+        return self._data[key]
+
+    def put(self, key, **values):
+        self._data[key] = values
+        write_file_atomic(self.filename, json.dumps(self._data).encode('utf-8'))
 
 class GameHistory:
-    def __init__(self):
+    # Codec of newly saved games, any name in GAME_CODECS; files of every codec are read
+    save_format = 'binary'
+    # Parsed games kept by load_game, shared by every instance
+    game_cache = GameCache(2 * 1024 * 1024)
+    # Saves, deletes and imports from any instance or thread update the indexes one at a time
+    write_lock = threading.RLock()
+
+    def __init__(self, base_dir=None):
+        """Set up the history directory and its indexes
+
+        Args:
+            base_dir (str): History directory to use instead of the platform default,
+                          e.g. for batch tools working on a copied archive.
+        """
         # Get the appropriate storage directory based on platform
-        if platform == 'android':
+        if base_dir is not None:
+            self.base_dir = base_dir
+        elif platform == 'android':
             from jnius import autoclass
             
             # Get Android's app private storage directory
@@ -22,66 +346,59 @@ class GameHistory:
         # Create base directory if it doesn't exist
         os.makedirs(self.base_dir, exist_ok=True)
         
-        # Initialize JsonStore for metadata
-        self.metadata_store = JsonStore(os.path.join(self.base_dir, 'metadata.json'))
+        # Initialize the metadata store
+        self.metadata_store = MetadataStore(os.path.join(self.base_dir, 'metadata.json'))
+
+        # Indexes live in a subdirectory so they are never listed or exported as games
+        self.index_dir = os.path.join(self.base_dir, 'index')
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.stats_index = PlayerStatsIndex(self.index_dir)
+        self.catalog = HistoryCatalog(self.index_dir)
+        self.export_manifest = ExportManifest(self.index_dir)
+        self.mark_dataset = MarkDataset(self.index_dir)
         
+    @metrics.timed('history.save_game')
+    @_holding_write_lock
     def save_game(self, game):
         """Save game history to a file"""
-        try:
-            # Create filename with player names and date
-            rounds = int((len(game.mark_history) + 1) / 2)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M')
-            filename = f"R{rounds} {game.players[0].name}{{{game.players[0].mpr:.2f}}} vs {game.players[1].name}{{{game.players[1].mpr:.2f}}} on {timestamp}.json"
-            filepath = os.path.join(self.base_dir, filename)
-            
-            # Prepare game data for serialization
-            game_data = {
-                'players': [
-                    {'name': game.players[0].name, 'score': game.players[0].score, 'mpr': game.players[0].mpr},
-                    {'name': game.players[1].name, 'score': game.players[1].score, 'mpr': game.players[1].mpr},
-                ],
-                'winner': {
-                    'id': game.get_winner_index(),
-                    'name': game.players[game.get_winner_index()].name,
-                    'score': game.players[game.get_winner_index()].score
-                }, 
-                'settings': {
-                    'highest_sector': game.highest_sector,
-                    'lowest_sector': game.lowest_sector,
-                    'bull_points': game.bull_points
-                },
-                'history': []
-            }
-            
-            # Add each round's marks
-            for round_marks in game.mark_history:
-                round_data = []
-                for mark in round_marks:
-                    round_data.append({
-                        'player': mark['player'],
-                        'sector': mark['sector'],
-                        'was_scoring': mark['was_scoring'],
-                        'points': mark['points']
-                    })
-                game_data['history'].append(round_data)
-            
-            # Write to file
-            with open(filepath, 'w') as f:
-                json.dump(game_data, f, indent=2)
-            
-            # Update metadata with latest game info
-            self.metadata_store.put('latest_game', 
-                player1_name=game.players[0].name,
-                player2_name=game.players[1].name,
-                timestamp=timestamp,
-                filepath=filepath
-            )
-            
-            return filepath, None
-            
-        except Exception as e:
-            return None, str(e)
-    
+        return self._save_game(game, aborted=False)
+
+    @metrics.timed('history.get_player_stats')
+    def get_player_stats(self, progress=None):
+        """Get the aggregated per-player stats, rebuilding the index if needed
+
+        Args:
+            progress: Optional function called with (done, total) while rebuilding
+        """
+        player_stats = self.stats_index.load()
+        if player_stats is None:
+            with self.write_lock:
+                # Another thread may have rebuilt the index while this one waited for the lock
+                player_stats = self.stats_index.load()
+                if player_stats is None:
+                    player_stats = self.rebuild_player_stats(progress)
+        return player_stats
+
+    @metrics.timed('history.rebuild_player_stats')
+    @_holding_write_lock
+    def rebuild_player_stats(self, progress=None, workers=0):
+        """Recalculate the player stats index from all completed game files
+
+        Files are streamed from the directory rather than listed from the
+        catalog, so rebuilding takes the same memory for any history size.
+        Holds the write lock throughout, so no game is saved, deleted or
+        imported halfway through the scan and left out of the index.
+
+        Args:
+            progress: Optional function called with (done, total)
+            workers (int): Worker processes to spread the files over, 0 to read them in this process
+        """
+        total = sum(1 for _ in iter_game_files(self.base_dir)) if progress else None
+        player_stats = compute_player_stats(self.base_dir, iter_game_files(self.base_dir), workers, progress, total)
+        self.stats_index.save(player_stats)
+        return player_stats
+
+    @metrics.timed('history.get_latest_players')
     def get_latest_players(self):
         """Get the latest player names from history"""
         try:
@@ -161,8 +478,22 @@ class GameHistory:
         except Exception as e:
             raise Exception(f"Storage permission request failed: {str(e)}")
 
-    def export_history(self):
-        """Export game history to a zip file"""
+    @metrics.timed('history.export_history')
+    def export_history(self, as_json=True, full=False, progress=None):
+        """Export game history to a zip file
+
+        By default only files added or changed since the previous export are
+        packed, judged by the content hashes in the export manifest.
+
+        Args:
+            as_json (bool): If True (default), binary and compressed game files are
+                          converted to JSON in the archive so any app version can import them.
+            full (bool): If True, pack every file regardless of earlier exports
+            progress: Optional function called with (done, total)
+
+        Returns:
+            Tuple of (zip path, error); both are None if there was nothing new to export
+        """
         try:
             # Request permissions if on Android
             if platform == 'android':
@@ -182,28 +513,74 @@ class GameHistory:
                 # On other platforms, use the current directory
                 export_dir = os.path.expanduser('~')
 
-            # Create zip filename with timestamp
+            # Hash the files and keep only those the last export did not contain
+            names = [f for f in os.listdir(self.base_dir) if is_game_file(f)]
+            exported = self.export_manifest.load()
+            # Hashing is the first half of the work, packing the second
+            scan_progress = (lambda done, total: progress(done, 2 * total)) if progress else None
+            current = self.export_manifest.scan(self.base_dir, names, exported, scan_progress)
+            if not full:
+                names = [f for f in names if exported.get(f, {}).get('hash') != current[f]['hash']]
+            if not names:
+                return None, None
+
+            # Create zip filename with timestamp; deltas keep the prefix so import finds them
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            zip_filename = f'window_cricket_history_{timestamp}.zip'
+            delta = not full and exported
+            zip_filename = f'window_cricket_history_{timestamp}{"_delta" if delta else ""}.zip'
             zip_path = os.path.join(export_dir, zip_filename)
 
-            # Create zip file
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add all game files
-                for f in os.listdir(self.base_dir):
-                    if f.endswith('.txt') or f.endswith('.json'):
-                        file_path = os.path.join(self.base_dir, f)
-                        zipf.write(file_path, f)
+            # Write under a temporary name that import ignores, so a cancelled or failed
+            # export never leaves a partial archive that looks like the newest one
+            tmp_path = zip_path + '.tmp'
+            try:
+                with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                    # Add new and changed game files
+                    for i, f in enumerate(names):
+                        if progress:
+                            progress(len(names) + i, 2 * len(names))
+                        if as_json and not f.endswith(('.json', '.txt')):
+                            json_name = game_file_stem(f) + '.json'
+                            if os.path.exists(os.path.join(self.base_dir, json_name)):
+                                continue  # Already exported as its JSON twin
+                            zipf.writestr(json_name, json.dumps(self.load_game(f, cached=False), indent=2))
+                        else:
+                            file_path = os.path.join(self.base_dir, f)
+                            zipf.write(file_path, f)
+                os.replace(tmp_path, zip_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
 
+            # Only remember the export once the archive is complete
+            self.export_manifest.save(current)
             return zip_path, None
 
+        except TaskCancelled:
+            raise
         except PermissionError:
             return None, "eh(), exc: Storage permission denied. Please grant storage permissions in Android settings"
         except Exception as e:
             return None, f"Failed to export history: {str(e)}"
 
-    def import_history(self):
-        """Import game history from a zip file"""
+    @metrics.timed('history.import_history')
+    @_holding_write_lock
+    def import_history(self, progress=None):
+        """Import game history from the most recent full export and every delta export after it
+
+        Archives are read newest first, so the latest version of a game wins.
+        Games already present with the same content are skipped, and games
+        whose name matches a different local game are left alone and reported
+        as conflicts, so an import never overwrites local files.
+
+        Args:
+            progress: Optional function called with (done, total)
+
+        Returns:
+            Tuple of (summary, error). The summary dict holds zip_path (the newest
+            archive), zip_paths, the counts of new, duplicate and conflict games,
+            and the conflicting filenames.
+        """
         try:
             # Request permissions if on Android
             if platform == 'android':
@@ -222,123 +599,442 @@ class GameHistory:
                 # On other platforms, use the current directory
                 import_dir = os.path.expanduser('~')
 
-            # Find the most recent zip file in the directory
-            zip_files = [f for f in os.listdir(import_dir) if f.startswith('window_cricket_history_') and f.endswith('.zip')]
-            if not zip_files:
+            zip_paths = history_archives(import_dir)
+            if not zip_paths:
                 return None, f'No history zip files found in {import_dir}'
 
-            # Sort by modification time, most recent first
-            latest_zip = max(zip_files, key=lambda f: os.path.getmtime(os.path.join(import_dir, f)))
-            zip_path = os.path.join(import_dir, latest_zip)
+            summary = {'zip_path': zip_paths[0], 'zip_paths': zip_paths,
+                       'new': 0, 'duplicate': 0, 'conflict': 0, 'conflicts': []}
 
-            # Extract files to game history directory
-            with zipfile.ZipFile(zip_path, 'r') as zipf:
-                zipf.extractall(self.base_dir)
+            # Hashes of the local files, reusing the export manifest for files it already hashed
+            local_names = [f for f in os.listdir(self.base_dir) if is_game_file(f)]
+            local = self.export_manifest.scan(self.base_dir, local_names, self.export_manifest.load())
+            local_hashes = {record['hash'] for record in local.values()}
+            # Local files by name without extension, so a .wcg game matches its exported .json
+            local_stems = {game_file_stem(f): f for f in local_names}
 
-            return zip_path, None
+            player_stats = self.stats_index.load()
+            catalog_exists = self.catalog.exists()
+            dataset_exists = self.mark_dataset.exists()
+            dataset_games = []
+            restored = set()  # Stems of the games written by this import
+
+            try:
+                total = 0
+                for zip_path in zip_paths:
+                    with zipfile.ZipFile(zip_path, 'r') as zipf:
+                        total += len(archive_members(zipf))
+                done = 0
+                for zip_path in zip_paths:
+                    # Stream the archive one entry at a time instead of extracting it wholesale
+                    with zipfile.ZipFile(zip_path, 'r') as zipf:
+                        for member in archive_members(zipf):
+                            if progress:
+                                progress(done, total)
+                            done += 1
+                            # Never write outside the history directory, whatever paths the archive holds
+                            filename = os.path.basename(member.filename)
+                            data = zipf.read(member)
+                            digest = hashlib.sha256(data).hexdigest()
+                            if digest in local_hashes:
+                                summary['duplicate'] += 1
+                                continue
+
+                            stem = game_file_stem(filename)
+                            if stem in restored:
+                                summary['duplicate'] += 1  # An older version of a game restored from a newer archive
+                                continue
+                            if stem in local_stems:
+                                # Same game name: a duplicate in another format, or a different game
+                                try:
+                                    same = decode_game_data(data) == self.load_game(local_stems[stem])
+                                except (OSError, ValueError):
+                                    same = False
+                                if same:
+                                    summary['duplicate'] += 1
+                                else:
+                                    summary['conflict'] += 1
+                                    summary['conflicts'].append(filename)
+                                continue
+
+                            # Write atomically so an interrupted import never leaves a truncated game
+                            filepath = os.path.join(self.base_dir, filename)
+                            write_file_atomic(filepath, data, sync=False)
+                            self.game_cache.discard(filepath)
+                            local_hashes.add(digest)
+                            local_stems[stem] = filename
+                            restored.add(stem)
+                            summary['new'] += 1
 
+                            # Update the indexes for this game only
+                            if catalog_exists:
+                                self.catalog.add(self._catalog_entry_for_file(filename))
+                            if player_stats is None and not dataset_exists:
+                                continue
+                            try:
+                                game_data = decode_game_data(data)
+                            except ValueError:
+                                continue  # Legacy text histories have no stats or marks
+                            if player_stats is not None and not filename.startswith('aborted_'):
+                                add_game_stats(player_stats, game_data)
+                            if dataset_exists:
+                                dataset_games.append((filename, game_data, self._file_timestamp(filename)))
+                                if len(dataset_games) >= 1000:
+                                    self.mark_dataset.append(dataset_games)
+                                    dataset_games = []
+            except TaskCancelled:
+                # Cancelled between two games, so the indexes hold every game written so far
+                self._save_import_indexes(summary, player_stats, dataset_games)
+                raise
+            except Exception:
+                # Stopped partway through a game that the indexes may be missing; rebuild them when next needed
+                if summary['new']:
+                    self.catalog.invalidate()
+                    self.stats_index.invalidate()
+                    self.mark_dataset.invalidate()
+                raise
+            self._save_import_indexes(summary, player_stats, dataset_games)
+
+            return summary, None
+
+        except TaskCancelled:
+            raise
         except PermissionError:
             return None, "ih(), exc: Storage permission denied. Please grant storage permissions in Android settings"
         except Exception as e:
             return None, f"Failed to import history: {str(e)}"
 
-    def get_history_files(self, completed_only=True):
+    def _save_import_indexes(self, summary, player_stats, dataset_games):
+        """Store the index updates of the games an import has written"""
+        if not summary['new']:
+            return
+        # One sync for the whole archive instead of one per game
+        if hasattr(os, 'sync'):
+            os.sync()
+        if player_stats is not None:
+            self.stats_index.save(player_stats)
+        if dataset_games:
+            self.mark_dataset.append(dataset_games)
+
+    @metrics.timed('history.get_history_files')
+    def get_history_files(self, completed_only=True, progress=None):
         """Get list of history files sorted by the timestamp in the filename
         
         Args:
             completed_only (bool): If True, return only completed games (default).
                                  If False, return only uncompleted (aborted) games.
+            progress: Optional function called with (done, total) if the catalog has to be rebuilt
         """
-        # Get list of files
-        files = []
-        aborted_only = not completed_only
-        for f in os.listdir(self.base_dir):
-            if (f.endswith('.json') or f.endswith('.txt')) and f != 'metadata.json':
-                # Check if file matches the requested completion status
-                is_aborted = f.startswith('aborted_')
-                if (completed_only and not is_aborted) or (aborted_only and is_aborted):
-                    # Extract timestamp from filename
-                    try:
-                        # Find the "on" part and get the timestamp
-                        timestamp_str = f.split(' on ')[1].split('.')[0]
-                        # Parse the timestamp
-                        timestamp = datetime.strptime(timestamp_str, '%Y%m%d_%H%M')
-                        files.append((f, timestamp))
-                    except (IndexError, ValueError):
-                        # If timestamp parsing fails, use file modification time as fallback
-                        filepath = os.path.join(self.base_dir, f)
-                        mtime = os.path.getmtime(filepath)
-                        files.append((f, datetime.fromtimestamp(mtime)))
-        
-        # Sort by timestamp, most recent first
-        files.sort(key=lambda x: x[1], reverse=True)
-        
-        # Return just the filenames
-        return [f[0] for f in files]
+        if not self.catalog.exists():
+            self.rebuild_catalog(progress)
+        return self.catalog.list_files(aborted=not completed_only)
 
-    def load_game(self, filename):
-        """Load game data from a file"""
-        filepath = os.path.join(self.base_dir, filename)
-        with open(filepath, 'r') as f:
-            return json.load(f)
+    @metrics.timed('history.get_history_entries')
+    def get_history_entries(self, completed_only=True, progress=None):
+        """Get the catalog records of history files, most recent first
 
+        Takes the same arguments as get_history_files.
+        """
+        if not self.catalog.exists():
+            self.rebuild_catalog(progress)
+        return self.catalog.list_entries(aborted=not completed_only)
+
+    @metrics.timed('history.rebuild_catalog')
+    def rebuild_catalog(self, progress=None):
+        """Recreate the history catalog by scanning the history directory
+
+        The files are read without the write lock, so saves and deletes go
+        ahead meanwhile; games that arrived or went during the scan are caught
+        up under the lock, right before the catalog is written.
+        """
+        files = [f for f in os.listdir(self.base_dir) if is_game_file(f)]
+        entries = {}
+        for i, f in enumerate(files):
+            if progress:
+                progress(i, len(files))
+            entries[f] = self._catalog_entry_for_file(f)
+        with self.write_lock:
+            current = {f for f in os.listdir(self.base_dir) if is_game_file(f)}
+            for f in current.difference(entries):
+                entries[f] = self._catalog_entry_for_file(f)
+            self.catalog.rewrite([entry for f, entry in entries.items() if f in current])
+
+    @metrics.timed('history.get_mark_dataset')
+    def get_mark_dataset(self, progress=None):
+        """Get the MarkDataset of the history, compiling it if needed
+
+        Args:
+            progress: Optional function called with (done, total) while compiling
+        """
+        if not self.mark_dataset.exists():
+            with self.write_lock:
+                # Another thread may have compiled it while this one waited for the lock
+                if not self.mark_dataset.exists():
+                    self.compile_mark_dataset(progress)
+        return self.mark_dataset
+
+    @metrics.timed('history.compile_mark_dataset')
+    @_holding_write_lock
+    def compile_mark_dataset(self, progress=None):
+        """Rebuild the columnar mark dataset from every readable game file, oldest first
+
+        Holds the write lock, as saves append to the dataset.
+        """
+        files = sorted((self._file_timestamp(f), f) for f in os.listdir(self.base_dir) if is_game_file(f))
+
+        def games():
+            for i, (timestamp, f) in enumerate(files):
+                if progress:
+                    progress(i, len(files))
+                try:
+                    game_data = self.load_game(f, cached=False)
+                except (OSError, ValueError):
+                    continue  # Skip unreadable files, e.g. legacy text histories
+                if game_data:
+                    yield f, game_data, timestamp
+
+        self.mark_dataset.rewrite(games())
+
+    def _catalog_entry_for_file(self, filename):
+        """Build a catalog record by reading a game file from disk"""
+        try:
+            game_data = self.load_game(filename, cached=False)
+        except (OSError, ValueError):
+            game_data = None  # Legacy text histories are listed without details
+        return make_catalog_entry(filename, game_data, self._file_timestamp(filename))
+
+    def _file_timestamp(self, filename):
+        """Get when a game was played from its filename"""
+        timestamp = parse_filename_timestamp(filename)
+        if timestamp is None:
+            # If timestamp parsing fails, use file modification time as fallback
+            timestamp = datetime.fromtimestamp(os.path.getmtime(os.path.join(self.base_dir, filename)))
+        return timestamp
+
+    @metrics.timed('history.load_game')
+    def load_game(self, filename, cached=True):
+        """Load game data from a file in any format, detected from its content
+
+        Args:
+            cached (bool): Use the game cache; bulk scans pass False so they
+                           do not push out the games the user is looking at
+
+        Returns:
+            The game data, a copy callers are free to modify
+        """
+        path = os.path.join(self.base_dir, filename)
+        if cached:
+            st = os.stat(path)
+            game_data = self.game_cache.get(path, (st.st_mtime_ns, st.st_size))
+            if game_data is not None:
+                return copy_game_data(game_data)
+            metrics.count('history.load_game.miss')
+        with open(path, 'rb') as f:
+            if not cached:
+                return decode_game_data(f.read())
+            # Stamp with what was actually read, in case the file changed since the stat
+            st = os.fstat(f.fileno())
+            game_data = decode_game_data(f.read())
+        self.game_cache.put(path, (st.st_mtime_ns, st.st_size), game_data, game_data_cost(game_data))
+        return copy_game_data(game_data)
+
+    @metrics.timed('history.delete_game')
+    @_holding_write_lock
     def delete_game(self, filename):
         """Delete a game file"""
         filepath = os.path.join(self.base_dir, filename)
         if os.path.exists(filepath):
+            game_data = None
+            if not filename.startswith('aborted_'):
+                try:
+                    game_data = self.load_game(filename, cached=False)
+                except (OSError, ValueError):
+                    pass
             os.remove(filepath)
+            self.game_cache.discard(filepath)
+            self.catalog.remove(filename)
+            # Mark rows cannot be taken out of the columns, so compile them again when next needed
+            self.mark_dataset.invalidate()
+
+            # Remove the game from the player stats index
+            player_stats = self.stats_index.load()
+            if player_stats is not None and game_data:
+                if remove_game_stats(player_stats, game_data):
+                    self.stats_index.save(player_stats)
+                else:
+                    self.stats_index.invalidate()
             return True, None
         return False, "File not found"
 
+    @metrics.timed('history.save_aborted_game')
+    @_holding_write_lock
     def save_aborted_game(self, game):
         """Save an aborted game to a file"""
+        return self._save_game(game, aborted=True)
+
+    def _save_game(self, game, aborted):
+        """Write a completed or aborted game and add it to the indexes
+
+        Returns:
+            tuple: (file path, error message)
+        """
+        try:
+            return self.write_game(prepare_game(game, aborted)), None
+        except Exception as e:
+            return None, str(e)
+
+    @metrics.timed('history.write_game')
+    @_holding_write_lock
+    def write_game(self, pending):
+        """Write a game from prepare_game and add it to the indexes
+
+        Writing the same pending game again rewrites the same file, so a failed
+        save can be retried without leaving a second copy or counting it twice.
+
+        Returns:
+            The file path
+
+        Raises:
+            OSError: If the game or an index could not be written
+        """
+        game_data = pending.game_data
+        payload, extension = encode_game_data(game_data, self.save_format)
+        filename = pending.filename_base + extension
+        filepath = os.path.join(self.base_dir, filename)
+        write_file_atomic(filepath, payload)
+        self.game_cache.discard(filepath)
+
         try:
-            # Create filename with player names and date
-            rounds = int((len(game.mark_history) + 1) / 2)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M')
-            filename = f"aborted_R{rounds} {game.players[0].name}{{{game.players[0].mpr:.2f}}} vs {game.players[1].name}{{{game.players[1].mpr:.2f}}} on {timestamp}.json"
-            filepath = os.path.join(self.base_dir, filename)
-            
-            # Prepare game data for serialization
-            game_data = {
-                'players': [
-                    {'name': game.players[0].name, 'score': game.players[0].score, 'mpr': game.players[0].mpr},
-                    {'name': game.players[1].name, 'score': game.players[1].score, 'mpr': game.players[1].mpr},
-                ],
-                'winner': None,  # No winner for aborted games
-                'settings': {
-                    'highest_sector': game.highest_sector,
-                    'lowest_sector': game.lowest_sector,
-                    'bull_points': game.bull_points
-                },
-                'history': []
-            }
-            
-            # Add each round's marks
-            for round_marks in game.mark_history:
-                round_data = []
-                for mark in round_marks:
-                    round_data.append({
-                        'player': mark['player'],
-                        'sector': mark['sector'],
-                        'was_scoring': mark['was_scoring'],
-                        'points': mark['points']
-                    })
-                game_data['history'].append(round_data)
-            
-            # Write to file
-            with open(filepath, 'w') as f:
-                json.dump(game_data, f, indent=2)
-            
             # Update metadata with latest game info
-            self.metadata_store.put('latest_game', 
-                player1_name=game.players[0].name,
-                player2_name=game.players[1].name,
-                timestamp=timestamp,
+            self.metadata_store.put('latest_game',
+                player1_name=game_data['players'][0]['name'],
+                player2_name=game_data['players'][1]['name'],
+                timestamp=pending.timestamp,
                 filepath=filepath
             )
-            
-            return filepath, None
-            
-        except Exception as e:
-            return None, str(e)
\ No newline at end of file
+
+            # Add the game to the catalog and mark dataset; missing ones are rebuilt when next needed.
+            # Catalog records are keyed by filename, so adding one again replaces it
+            played = datetime.strptime(pending.timestamp, '%Y%m%d_%H%M')
+            if self.catalog.exists():
+                self.catalog.add(make_catalog_entry(filename, game_data, played))
+            self.mark_dataset.append([(filename, game_data, played)])
+
+            # Fold a completed game into the player stats index
+            player_stats = self.stats_index.load() if not pending.aborted else None
+            if player_stats is not None:
+                add_game_stats(player_stats, game_data)
+                self.stats_index.save(player_stats)
+        except Exception:
+            # The game may already be counted; rebuild the indexes rather than count it again on a retry
+            self.stats_index.invalidate()
+            self.mark_dataset.invalidate()
+            raise
+
+        return filepath
+
+
+def history_archives(directory):
+    """Find the export archives an import restores, newest first
+
+    A delta export only holds the games added since the export before it, so
+    the newest full export is needed along with every delta made after it.
+    """
+    zip_files = [f for f in os.listdir(directory) if f.startswith('window_cricket_history_') and f.endswith('.zip')]
+    paths = sorted((os.path.join(directory, f) for f in zip_files), key=os.path.getmtime, reverse=True)
+    for i, path in enumerate(paths):
+        if not path.endswith('_delta.zip'):
+            return paths[:i + 1]
+    return paths
+
+
+def archive_members(zipf):
+    """Get the game file entries of an export archive"""
+    return [m for m in zipf.infolist() if not m.is_dir() and is_game_file(os.path.basename(m.filename))]
+
+
+def player_stats_summary(base_dir, progress=None):
+    """Load and summarize the player stats of a history directory
+
+    Args:
+        progress: Optional function called with (done, total) if the index has to be rebuilt
+    """
+    # Work on a copy so the summary fields never leak into the index
+    return summarize_player_stats(copy.deepcopy(GameHistory(base_dir).get_player_stats(progress)))
+
+
+def iter_game_files(base_dir, completed_only=True):
+    """Yield the names of the game files in a directory without listing them all at once
+
+    Args:
+        completed_only (bool): If True, yield only completed games, else only aborted ones
+    """
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if is_game_file(name) and name.startswith('aborted_') != completed_only:
+                yield name
+
+
+def iter_game_records(base_dir, filenames):
+    """Parse game files one at a time, skipping unreadable ones such as legacy text histories"""
+    for f in filenames:
+        try:
+            with open(os.path.join(base_dir, f), 'rb') as fh:
+                game_data = decode_game_data(fh.read())
+        except (OSError, ValueError):
+            continue
+        if game_data:
+            yield game_data
+
+
+def files_player_stats(base_dir, filenames):
+    """Aggregate the player stats of some game files, the map step of compute_player_stats
+
+    Module-level so it can run in a worker process.
+    """
+    return aggregate_player_stats(stats_events(iter_game_records(base_dir, filenames)))
+
+
+def compute_player_stats(base_dir, filenames, workers=0, progress=None, total=None):
+    """Aggregate the player stats of game files per chunk and merge the chunks in file order
+
+    The result is the same as adding the games one by one, whether the chunks
+    are read here or by a pool of worker processes. filenames may be any
+    iterable; only a few chunks of names and one game per process are held
+    at a time, so memory stays flat however many files there are.
+
+    Args:
+        workers (int): Worker processes, 0 to read every chunk in this process
+        progress: Optional function called with (done, total)
+        total (int): Number of files for progress, if filenames has no len()
+    """
+    if total is None and progress:
+        total = len(filenames)
+    names = iter(filenames)
+    chunks = iter(lambda: list(islice(names, STATS_CHUNK_SIZE)), [])
+    player_stats = {}
+    done = 0
+
+    def merge(count, part):
+        nonlocal done
+        merge_player_stats(player_stats, part)
+        done += count
+        if progress:
+            progress(done, total)
+
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a bounded number of chunks in flight and merge them in submission order
+            pending = deque()
+            for chunk in chunks:
+                pending.append((len(chunk), pool.submit(files_player_stats, base_dir, chunk)))
+                if len(pending) > workers * 2:
+                    count, future = pending.popleft()
+                    merge(count, future.result())
+            for count, future in pending:
+                merge(count, future.result())
+    else:
+        for chunk in chunks:
+            merge(len(chunk), files_player_stats(base_dir, chunk))
+    return player_stats
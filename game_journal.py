@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import threading
+
+# Single-letter operation codes written to the journal, one per line
+OP_HIT = 'h'
+OP_UNDO_MARK = 'u'
+OP_UNDO_THROW = 't'
+OP_SWITCH = 's'
+OP_REDO = 'r'
+OP_REWIND = 'w'
+
+
+class MarkJournal:
+    """Append-only journal of the match in progress
+
+    The first line holds the game settings as JSON, every following line one
+    operation ('h <sector>', 'u', 't', 's', 'r' or 'w <rounds>'). Recording an operation only
+    appends to an in-memory buffer; the buffer is written out at the end of
+    each round, once it holds flush_every operations, or when flush_interval
+    seconds have passed, so taps never wait for storage.
+
+    Opening, flushing and discarding hold a lock, so a background save can
+    discard the journal of the game it saved while the UI thread starts the
+    next one.
+    """
+
+    def __init__(self, base_dir, flush_every=9, flush_interval=2.0):
+        self.path = os.path.join(base_dir, 'current_game.journal')
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._file = None
+        self._last_flush = 0.0
+        self._valid_length = 0
+        self.game = None  # The game being journaled
+        self._lock = threading.RLock()
+
+    def start(self, game):
+        """Start journaling a new game, replacing any previous journal"""
+        with self._lock:
+            self.close()
+            header = {
+                'player1_name': game.players[0].name,
+                'player2_name': game.players[1].name,
+                'highest_sector': game.highest_sector,
+                'lowest_sector': game.lowest_sector,
+                'bull_points': game.bull_points
+            }
+            self._file = open(self.path, 'w')
+            self._file.write(json.dumps(header) + '\n')
+            self._buffer = []
+            self.flush(sync=True)
+            self.game = game
+            game.journal = self
+
+    def resume(self, game):
+        """Continue journaling a game returned by recover()"""
+        with self._lock:
+            self.close()
+            os.truncate(self.path, self._valid_length)
+            self._file = open(self.path, 'a')
+            self._buffer = []
+            self._last_flush = time.monotonic()
+            self.game = game
+            game.journal = self
+
+    def rewrite(self, game):
+        """Replace the journal with the marks and switches that reach game's current position
+
+        Used when the game jumps to a position the recorded operations do not
+        lead to, such as CricketGame.restore().
+        """
+        with self._lock:
+            self.start(game)
+            for round_marks in game.mark_history:
+                self._buffer.extend(f'{OP_HIT} {mark["sector"]}' for mark in round_marks)
+                self._buffer.append(OP_SWITCH)
+            self._buffer.extend(f'{OP_HIT} {mark["sector"]}' for mark in game.current_round_marks[-1])
+            self.flush(sync=True)
+
+    def record(self, op, arg=None):
+        """Buffer one game operation"""
+        if self._file is None:
+            return
+        self._buffer.append(op if arg is None else f'{op} {arg}')
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self, sync=False):
+        """Write buffered operations to the journal file
+
+        Args:
+            sync (bool): If True, also force the data to storage with fsync
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            if self._buffer:
+                self._file.write('\n'.join(self._buffer) + '\n')
+                self._buffer = []
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush and close the journal file, keeping it on disk"""
+        with self._lock:
+            if self._file is not None:
+                self.flush(sync=True)
+                self._file.close()
+                self._file = None
+
+    def discard(self, game=None):
+        """Close and delete the journal once the game is saved
+
+        Args:
+            game: The game that was saved; if another game is being journaled
+                  by now, its journal is kept
+        """
+        with self._lock:
+            if game is not None and self.game is not None and game is not self.game:
+                return
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._buffer = []
+            self.game = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def recover(self, game_class):
+        """Rebuild the journaled game by replaying its operations
+
+        Args:
+            game_class: Game class to instantiate, called with the journaled settings
+
+        Returns:
+            The rebuilt game, or None if there is no usable journal
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Drop a trailing partial line left by an interrupted write
+        self._valid_length = data.rfind(b'\n') + 1
+        lines = data[:self._valid_length].decode('utf-8').splitlines()
+        if not lines:
+            return None
+        try:
+            game = game_class(**json.loads(lines[0]))
+        except (ValueError, TypeError):
+            return None
+
+        for line in lines[1:]:
+            op, _, arg = line.partition(' ')
+            if op == OP_HIT:
+                game.add_hit(arg)
+            elif op == OP_UNDO_MARK:
+                game.undo_last_mark()
+            elif op == OP_UNDO_THROW:
+                game.undo_last_throw()
+            elif op == OP_SWITCH:
+                game.switch_player()
+                game.check_game_over()
+            elif op == OP_REDO:
+                game.redo()
+            elif op == OP_REWIND:
+                game.rewind_rounds(int(arg))
+        return game
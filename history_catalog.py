@@ -0,0 +1,276 @@
+import os
+import json
+import threading
+from datetime import datetime
+from atomic_file import write_file_atomic
+
+# Timestamps are stored in this sortable form so the catalog never has to parse dates
+CATALOG_TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+
+# Extensions of saved games: .txt for the legacy text histories, the rest one per
+# game codec; game_history.register_codec adds the extensions of new codecs
+GAME_FILE_EXTENSIONS = ['.json', '.txt', '.wcg', '.json.gz', '.json.zlib']
+
+
+def is_game_file(filename):
+    """Check if a file in the history directory holds a saved game"""
+    return filename.endswith(tuple(GAME_FILE_EXTENSIONS)) and filename != 'metadata.json'
+
+
+def game_file_stem(filename):
+    """Get a game filename without its extension, so one game saved by different codecs shares a stem"""
+    for extension in sorted(GAME_FILE_EXTENSIONS, key=len, reverse=True):
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return os.path.splitext(filename)[0]
+
+
+def parse_filename_timestamp(filename):
+    """Get the timestamp written in a game filename, or None if there is none"""
+    try:
+        # Find the "on" part and get the timestamp
+        timestamp_str = filename.split(' on ')[1].split('.')[0]
+        return datetime.strptime(timestamp_str, '%Y%m%d_%H%M')
+    except (IndexError, ValueError):
+        return None
+
+
+def make_catalog_entry(filename, game_data, timestamp):
+    """Build the catalog record for a game file
+
+    Args:
+        filename (str): Name of the game file in the history directory
+        game_data (dict): Parsed game data, or None for unreadable files
+        timestamp (datetime): When the game was played
+    """
+    entry = {
+        'filename': filename,
+        'timestamp': timestamp.strftime(CATALOG_TIMESTAMP_FORMAT),
+        'aborted': filename.startswith('aborted_'),
+        'players': [],
+        'mprs': [],
+        'rounds': None,
+        'settings': None
+    }
+    if game_data:
+        entry['players'] = [p.get('name') for p in game_data.get('players', [])]
+        entry['mprs'] = [p.get('mpr') for p in game_data.get('players', [])]
+        entry['rounds'] = int((len(game_data.get('history', [])) + 1) / 2)
+        entry['settings'] = game_data.get('settings')
+    return entry
+
+
+class HistoryCatalog:
+    """Append-only index of the saved games in the history directory
+
+    Every save appends one JSON line and every delete appends a tombstone, so
+    writes never rewrite the file. Readers keep the parsed catalog in memory and
+    only read lines appended since their last visit, which lets several
+    GameHistory instances share the catalog without rescanning the directory.
+    Public methods hold a lock, so worker threads can list games while the UI
+    thread saves or deletes them.
+    """
+
+    # Rewrite the file once tombstones and replaced records outnumber live entries
+    COMPACT_RATIO = 1.0
+
+    def __init__(self, index_dir):
+        self.path = os.path.join(index_dir, 'catalog.jsonl')
+        self._entries = {}
+        self._stale_lines = 0
+        self._offset = 0
+        self._inode = None
+        self._sorted = {}  # Cached sorted entry lists keyed by the aborted flag
+        self._lock = threading.RLock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def invalidate(self):
+        """Drop the catalog so it is rebuilt by scanning the history directory"""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._refresh()
+
+    def _refresh(self):
+        """Read any lines appended to the catalog file since the last refresh"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._entries = {}
+            self._stale_lines = 0
+            self._offset = 0
+            self._inode = None
+            self._sorted = {}
+            return
+
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # The file was compacted or replaced, read it from the start
+            self._entries = {}
+            self._stale_lines = 0
+            self._offset = 0
+            self._inode = st.st_ino
+        elif st.st_size == self._offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        # Ignore a trailing partial line left by an interrupted write
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += end
+        self._sorted = {}
+
+    def _apply(self, record):
+        if 'deleted' in record:
+            if self._entries.pop(record['deleted'], None) is not None:
+                self._stale_lines += 1
+            self._stale_lines += 1
+        else:
+            if record['filename'] in self._entries:
+                self._stale_lines += 1
+            self._entries[record['filename']] = record
+
+    def _append(self, record):
+        self._refresh()
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        self._refresh()
+        if self._stale_lines > len(self._entries) * self.COMPACT_RATIO:
+            self.rewrite(list(self._entries.values()))
+
+    def add(self, entry):
+        """Add or replace the record for a game file"""
+        with self._lock:
+            self._append(entry)
+
+    def remove(self, filename):
+        """Remove the record for a game file"""
+        with self._lock:
+            self._refresh()
+            if filename in self._entries:
+                self._append({'deleted': filename})
+
+    def get(self, filename):
+        """Get the record for a game file, or None if it is not catalogued"""
+        with self._lock:
+            self._refresh()
+            return self._entries.get(filename)
+
+    def entries(self):
+        """Get all catalogued records"""
+        with self._lock:
+            self._refresh()
+            return list(self._entries.values())
+
+    def list_entries(self, aborted=False):
+        """Get catalogued records sorted by timestamp, most recent first"""
+        with self._lock:
+            self._refresh()
+            if aborted not in self._sorted:
+                matching = [e for e in self._entries.values() if e['aborted'] == aborted]
+                matching.sort(key=lambda e: (e['timestamp'], e['filename']), reverse=True)
+                self._sorted[aborted] = matching
+            return list(self._sorted[aborted])
+
+    def list_files(self, aborted=False):
+        """Get catalogued filenames sorted by timestamp, most recent first"""
+        return [e['filename'] for e in self.list_entries(aborted)]
+
+    def rewrite(self, entries):
+        """Replace the whole catalog with the given records"""
+        with self._lock:
+            write_file_atomic(self.path, ''.join(json.dumps(entry) + '\n' for entry in entries).encode('utf-8'))
+            self._inode = None
+            self._refresh()
+
+
+def parse_filter_date(text):
+    """Turn a 'YYYY-MM-DD' filter date into the catalog's 'YYYYMMDD' form
+
+    Returns None for empty or incomplete input, so a half-typed date filters nothing.
+    """
+    try:
+        return datetime.strptime(text.strip(), '%Y-%m-%d').strftime('%Y%m%d')
+    except ValueError:
+        return None
+
+
+def parse_filter_window(text):
+    """Turn a 'highest-lowest' filter window such as '20-15' into a pair of ints
+
+    Returns None for empty or incomplete input.
+    """
+    try:
+        highest, lowest = (int(part) for part in text.split('-'))
+    except ValueError:
+        return None
+    return highest, lowest
+
+
+class HistoryQuery:
+    """Filtered view of catalog records for the history browser
+
+    Filters are reapplied on every keystroke. When the new player filter only
+    extends the previous one and nothing else changed, the previous matches
+    are narrowed down instead of scanning every record again.
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries (list): Catalog records in display order
+        """
+        self._entries = entries
+        self._matches = entries
+        self._filters = ('', None, None, None)
+
+    def __len__(self):
+        return len(self._matches)
+
+    def set_filters(self, player='', date_from=None, date_to=None, window=None):
+        """Filter by player name substring, date range and sector window
+
+        Args:
+            player (str): Case-insensitive part of either player's name
+            date_from (str): First day to include as 'YYYYMMDD', or None
+            date_to (str): Last day to include as 'YYYYMMDD', or None
+            window (tuple): (highest_sector, lowest_sector), or None
+        """
+        player = player.strip().lower()
+        filters = (player, date_from, date_to, window)
+        if filters == self._filters:
+            return
+        old_player = self._filters[0]
+        narrowing = filters[1:] == self._filters[1:] and player.startswith(old_player)
+        candidates = self._matches if narrowing else self._entries
+        self._filters = filters
+        if not any(filters):
+            self._matches = self._entries
+            return
+
+        matches = []
+        for entry in candidates:
+            if player and not any(player in (name or '').lower() for name in entry['players']):
+                continue
+            day = entry['timestamp'][:8]
+            if date_from and day < date_from:
+                continue
+            if date_to and day > date_to:
+                continue
+            if window:
+                settings = entry['settings'] or {}
+                if (settings.get('highest_sector'), settings.get('lowest_sector')) != window:
+                    continue
+            matches.append(entry)
+        self._matches = matches
+
+    def page(self, start, count):
+        """Get up to count matching records starting at position start"""
+        return self._matches[start:start + count]
@@ -4,14 +4,21 @@ from kivy.uix.button import Button
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.properties import NumericProperty, StringProperty, ColorProperty, BooleanProperty
 from kivy.uix.recycleview.views import RecycleDataViewBehavior
-from game_history import GameHistory
+from game_history import GameHistory, player_stats_summary, prepare_game
+from background_tasks import TaskRunner, SaveQueue
+from history_catalog import HistoryQuery, parse_filter_date, parse_filter_window
+from game_journal import MarkJournal
+from cricket_engine import CricketGame
+from perf_metrics import metrics
 import json
 import os
+from time import perf_counter_ns
 from kivy.clock import Clock
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.label import Label
 from kivy.uix.popup import Popup
-from kivy.metrics import dp
+from kivy.metrics import dp, sp
+from kivy.core.text import Label as CoreLabel
 import zipfile
 from datetime import datetime
 from kivy.utils import platform
@@ -19,207 +26,6 @@ from kivy.utils import platform
 class PlayerContainer(BoxLayout):
     background_color = ColorProperty([0.18, 0.18, 0.18, 1])  # Default dark gray
 
-class Player:
-    def __init__(self, name):
-        self.name = name
-        self.score = 0
-        self.sectors = {}  # Will be initialized with game settings
-        self.marks_this_round = 0  # Total marks made this round
-        self.sectors_hit_this_round = set()  # Set of sectors hit in current round
-        self.current_round_sector_hits = {}  # Track hits per sector in current round
-        self.mpr = 0.0
-        self.rounds = 1  # Add rounds counter
-
-    def calculate_mpr(self):
-        """Calculate Marks Per Round based on total marks in sectors"""
-        if self.rounds == 0:
-            return 1.0
-        total_marks = sum(self.sectors.values())
-        return total_marks / self.rounds
-
-class CricketGame:
-    def __init__(self, player1_name, player2_name, highest_sector, lowest_sector, bull_points):
-        self.players = [Player(player1_name), Player(player2_name)]
-        self.current_player = 0
-        self.game_over = False
-        self.highest_sector = highest_sector
-        self.lowest_sector = lowest_sector
-        self.bull_points = bull_points
-        
-        # Initialize sectors for both players
-        for player in self.players:
-            player.sectors = {str(i): 0 for i in range(lowest_sector, highest_sector + 1)}
-            player.sectors['Bull'] = 0
-            player.current_round_sector_hits = {str(i): 0 for i in range(lowest_sector, highest_sector + 1)}
-            player.current_round_sector_hits['Bull'] = 0
-            
-        # Initialize mark history tracking
-        self.mark_history = []  # List of rounds
-        self.current_round_marks = []  # List of marks in current round
-        self.current_round_marks.append([])  # Initialize first round
-    
-    def switch_player(self):
-        # Increment rounds for the leaving player
-        self.players[self.current_player].rounds += 1
-        
-        # Save current round marks to history and start new round
-        self.mark_history.append(self.current_round_marks[-1])  # Always store the round, even if empty
-        self.current_round_marks.append([])  # Start new round
-        
-        self.current_player = 1 - self.current_player
-        self.players[self.current_player].marks_this_round = 0
-        self.players[self.current_player].sectors_hit_this_round.clear()
-        # Reset current round sector hits for the new player
-        for sector in self.players[self.current_player].current_round_sector_hits:
-            self.players[self.current_player].current_round_sector_hits[sector] = 0
-        self.players[self.current_player].mpr = self.players[self.current_player].calculate_mpr()
-        
-    def add_hit(self, sector, hits=1):
-        if self.game_over:
-            return False
-
-        current = self.players[self.current_player]
-        opponent = self.players[1 - self.current_player]
-        
-        # Check if sector is closed (both players have 3 marks)
-        if current.sectors[sector] >= 3 and opponent.sectors[sector] >= 3:
-            return False  # Don't count hits on closed sectors
-        
-        # Check if player has already used 9 marks this round
-        if current.marks_this_round >= 9:
-            return False
-            
-        # Check if we've reached the limit of 3 sectors per turn
-        if len(current.sectors_hit_this_round) >= 3 and sector not in current.sectors_hit_this_round:
-            return False
-        
-        # Record the mark before making changes
-        mark_info = {
-            'player': self.current_player,
-            'sector': sector,
-            'was_scoring': current.sectors[sector] >= 3 and opponent.sectors[sector] < 3,
-            'points': self.bull_points if sector == 'Bull' else int(sector) if current.sectors[sector] >= 3 and opponent.sectors[sector] < 3 else 0
-        }
-        self.current_round_marks[-1].append(mark_info)
-        
-        # Update hits for the sector
-        if current.sectors[sector] < 3:
-            current.sectors[sector] += 1
-            current.marks_this_round += 1
-            current.sectors_hit_this_round.add(sector)
-            current.current_round_sector_hits[sector] += 1
-        else:
-            # Sector is already open (has 3 marks)
-            current.marks_this_round += 1
-            # Add points if sector is open by current player and not closed by opponent
-            if opponent.sectors[sector] < 3:
-                points = self.bull_points if sector == 'Bull' else int(sector)
-                current.sectors[sector] += 1
-                current.score += points
-                current.sectors_hit_this_round.add(sector)
-                current.current_round_sector_hits[sector] += 1
-
-        # Update MPR after the hit
-        current.mpr = current.calculate_mpr()
-        return True
-
-    def undo_last_mark(self):
-        if not self.current_round_marks or not self.current_round_marks[-1]:
-            return False
-            
-        # Get the last mark
-        last_mark = self.current_round_marks[-1].pop()
-        current = self.players[last_mark['player']]
-        sector = last_mark['sector']
-        
-        # Undo the mark
-        if current.sectors[sector] > 0:
-            current.sectors[sector] -= 1
-            current.marks_this_round -= 1
-            current.current_round_sector_hits[sector] -= 1
-            
-            # If this was the last hit in this sector for this round, remove from sectors_hit_this_round
-            if current.current_round_sector_hits[sector] == 0:
-                current.sectors_hit_this_round.discard(sector)
-            
-            # If this was a scoring hit, remove the points
-            if last_mark['was_scoring']:
-                current.score -= last_mark['points']
-        
-        # Update MPR after the undo
-        current.mpr = current.calculate_mpr()
-        return True
-
-    def undo_last_throw(self):
-        """Undo the current player's entire round and restore previous player's round"""
-        if not self.mark_history or not self.current_round_marks:
-            return False
-            
-        # Get the previous round from history
-        previous_round = self.mark_history.pop()
-        
-        # Undo all marks in current round
-        while self.current_round_marks[-1]:
-            self.undo_last_mark()
-            
-        # Remove the empty current round
-        self.current_round_marks.pop()
-        
-        # Switch back to previous player
-        self.current_player = 1 - self.current_player
-        
-        # Decrement rounds for the current player (since we're going back)
-        self.players[self.current_player].rounds -= 1
-        
-        # Restore previous player's round
-        self.current_round_marks.append(previous_round)
-        
-        # Restore previous player's state
-        current = self.players[self.current_player]
-        current.marks_this_round = len(previous_round)
-        current.sectors_hit_this_round.clear()
-        current.current_round_sector_hits = {str(i): 0 for i in range(self.lowest_sector, self.highest_sector + 1)}
-        current.current_round_sector_hits['Bull'] = 0
-        
-        # Restore sector hits from previous round
-        for mark in previous_round:
-            sector = mark['sector']
-            current.current_round_sector_hits[sector] += 1
-            current.sectors_hit_this_round.add(sector)
-        
-        # Update MPR
-        current.mpr = current.calculate_mpr()
-        return True
-
-    def check_game_over(self):
-        for player in self.players:
-            # Check if all sectors are closed (3 marks by both players)
-            all_closed = all(hits >= 3 for hits in player.sectors.values())
-            if all_closed and player.score >= max(p.score for p in self.players):
-                self.game_over = True
-                return True
-        return False
-    
-    def get_winner_index(self):
-        """Get the index of the winner"""
-        if not self.game_over:
-            raise ValueError("Game is not over")
-        
-        if self.players[0].score == self.players[1].score:
-            p1_closed_sectors = len([hits for hits in self.players[0].sectors.values() if hits >= 3])
-            p2_closed_sectors = len([hits for hits in self.players[1].sectors.values() if hits >= 3])
-            if p1_closed_sectors > p2_closed_sectors:
-                return 0
-            elif p1_closed_sectors < p2_closed_sectors:
-                return 1
-            else:
-                raise ValueError("Game is a draw")
-            
-        elif self.players[0].score > self.players[1].score:
-            return 0
-        else:
-            return 1
-    
 class SectorButton(Button):
     sector_state = StringProperty('normal')  # 'normal', 'opponent_open', 'player_open', 'closed'
     BLUE    = [0.2, 0.6, 0.9, 1] # dark blue
@@ -247,35 +53,77 @@ class SectorButton(Button):
         else:  # closed
             self.color = SectorButton.GRAY
 
+class IndicatorGlyphs:
+    """Prerendered textures for the few states a SectorIndicator can show
+
+    A mark is either hit or empty and a round has at most 9 hits, so every
+    texture is rendered once and indicators only swap textures afterwards
+    instead of laying out text on every tap.
+    """
+    MARK_FONT = 'assets/fonts/CODE2000.ttf'
+    DOTS_FONT = 'assets/fonts/Roboto-Bold.ttf'
+    _cache = {}
+
+    @classmethod
+    def _render(cls, text, font_name, font_size, color):
+        key = (text, font_name, font_size, color)
+        texture = cls._cache.get(key)
+        if texture is None:
+            label = CoreLabel(text=text, font_name=font_name, font_size=sp(font_size), bold=True, color=color)
+            label.refresh()
+            texture = cls._cache[key] = label.texture
+        return texture
+
+    @classmethod
+    def mark(cls, hit):
+        if hit:
+            return cls._render('✓', cls.MARK_FONT, 40, (0.2, 0.8, 0.2, 1))  # check mark, bright green for contrast
+        return cls._render('-', cls.MARK_FONT, 40, (0.4, 0.4, 0.4, 1))  # dash for empty, dark gray
+
+    @classmethod
+    def dots(cls, count):
+        dots = '•' * count
+        # Add space after every 3 dots; a lone space keeps the texture valid for 0 dots
+        dots = ' '.join(dots[i:i+3] for i in range(0, len(dots), 3)) or ' '
+        return cls._render(dots, cls.DOTS_FONT, 16, (0.8, 0.8, 0.8, 1))
+
 class SectorIndicator(BoxLayout):
     sector = StringProperty('')
     hits = NumericProperty(0)
     current_round_hits = NumericProperty(0)  # New property for current round hits
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.update_marks(0)
+
     def update_marks(self, hits, current_round_hits=0):
         """Update the visual marks to show the number of hits"""
         self.hits = hits
         self.current_round_hits = current_round_hits
-        
-        # Get mark widgets
-        mark1 = self.ids.get('mark1')
-        mark2 = self.ids.get('mark2')
-        mark3 = self.ids.get('mark3')
-        mark_widgets = [mark1, mark2, mark3]
-        
-        for i, mark in enumerate(mark_widgets):
-            if i < hits:
-                mark.text = '✓'  # check mark for hit
-                mark.color = (0.2, 0.8, 0.2, 1)  # Bright green for contrast
-            else:
-                mark.text = '-'  # dash for empty
-                mark.color = (0.4, 0.4, 0.4, 1)  # Dark gray
+
+        ids = self.ids
+        for i, mark in enumerate((ids.mark1, ids.mark2, ids.mark3)):
+            mark.texture = IndicatorGlyphs.mark(i < hits)
 
         # Update dots display
-        dots = '•' * current_round_hits
-        # Add space after every 3 dots
-        dots = ' '.join(dots[i:i+3] for i in range(0, len(dots), 3))
-        self.ids.dots_label.text = dots
+        ids.dots_label.texture = IndicatorGlyphs.dots(current_round_hits)
+
+def two_line_text(text):
+    """Split text, e.g. a file path, in two lines so it is readable on Android"""
+    half = max(1, (len(text) + 1) // 2)
+    return f"{text[:half]}\n{text[half:]}"
+
+
+def select_row(rv, old_index, new_index):
+    """Move the selection in a RecycleView, refreshing only the two affected rows"""
+    for index, selected in ((old_index, False), (new_index, True)):
+        if index is None or index >= len(rv.data):
+            continue
+        rv.data[index]['selected'] = selected
+        # Rows scrolled out of view pick up the flag from data when they are shown again
+        view = rv.view_adapter.get_visible_view(index)
+        if view is not None:
+            view.selected = selected
 
 class SelectableItem(RecycleDataViewBehavior, BoxLayout):
     """Base class for selectable items with double tap support"""
@@ -385,11 +233,46 @@ class MessageScreen(Screen):
         # Return to the caller screen
         self.manager.current = self.caller_screen
 
-class HistoryScreen(Screen):
+class TaskScreen(Screen):
+    """Screen that runs slow work in the background and cancels it when left"""
+    status_text = StringProperty('')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.tasks = []
+
+    def run_task(self, work, *args, process=False, **callbacks):
+        """Run work on the app's TaskRunner, tracking it for cancellation"""
+        runner = App.get_running_app().tasks
+        if process:
+            task = runner.submit_process(work, *args, **callbacks)
+        else:
+            task = runner.submit(work, *args, **callbacks)
+        self.tasks = [t for t in self.tasks if not t.future.done()] + [task]
+        return task
+
+    def cancel_tasks(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        self.status_text = ''
+
+    def show_progress(self, done, total):
+        self.status_text = f'Loading {done}/{total}'
+
+    def on_leave(self, *args):
+        self.cancel_tasks()
+
+class HistoryScreen(TaskScreen):
+    # Rows added to the list each time the user scrolls near its end
+    PAGE_SIZE = 50
+    LOAD_MORE_SCROLL_Y = 0.1
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.game_history = GameHistory()
         self.selected_index = None
+        self.query = None
 
     def show_message(self, title, message, callback=None):
         """Show a message in the text screen"""
@@ -465,28 +348,68 @@ class HistoryScreen(Screen):
             return f"Error formatting game data: {str(e)}"
 
     def list_history_files(self):
-        """List all history files in the RecycleView"""
-        try:
-            files = self.game_history.get_history_files()
-            self.ids.history_list.data = [{'text': f, 'selected': False} for f in files]
-            # Clear selection when refreshing the list
-            self.selected_index = None
-        except Exception as e:
-            self.show_message('Error', f'Failed to list history files:\n{str(e)}')
+        """Load the history catalog in a worker thread and show the first page of games"""
+        self.cancel_tasks()
+        self.query = None
+        self.ids.history_list.data = []
+        # Clear selection when refreshing the list
+        self.selected_index = None
+        self.status_text = 'Loading...'
+        self.run_task(
+            lambda task: self.game_history.get_history_entries(progress=task.progress),
+            on_progress=self.show_progress,
+            on_result=self.show_history_entries,
+            on_error=self.show_list_error
+        )
+
+    def show_list_error(self, error):
+        # An empty list rather than None, so returning from the message does not list again and fail again
+        self.query = HistoryQuery([])
+        self.show_message('Error', f'Failed to list history files:\n{str(error)}')
+
+    def on_enter(self, *args):
+        # Showing a message cancels a listing still running, and an import leaves the list to reload,
+        # so list the games again when coming back without one
+        if self.query is None and not self.tasks:
+            self.list_history_files()
+
+    def show_history_entries(self, entries):
+        self.status_text = ''
+        self.query = HistoryQuery(entries)
+        self.apply_filters()
+
+    def apply_filters(self):
+        """Filter the list by the filter inputs, showing the first page of matches"""
+        if self.query is None:
+            return
+        self.query.set_filters(
+            self.ids.player_filter.text,
+            parse_filter_date(self.ids.date_from_filter.text),
+            parse_filter_date(self.ids.date_to_filter.text),
+            parse_filter_window(self.ids.window_filter.text)
+        )
+        self.selected_index = None
+        self.ids.history_list.data = []
+        self.ids.history_list.scroll_y = 1.0
+        self.load_next_page()
+
+    def load_next_page(self):
+        """Append the next page of matching games to the list"""
+        data = self.ids.history_list.data
+        if self.query is None or len(data) >= len(self.query):
+            return
+        data.extend({'text': e['filename'], 'selected': False} for e in self.query.page(len(data), self.PAGE_SIZE))
+
+    def on_list_scroll(self, scroll_y):
+        # scroll_y runs from 1 at the top to 0 at the bottom
+        if scroll_y < self.LOAD_MORE_SCROLL_Y:
+            self.load_next_page()
 
     def select_with_touch(self, index, touch):
         """Handle selection of items in the RecycleView"""
-        # Deselect all items
-        for item in self.ids.history_list.data:
-            item['selected'] = False
-        
-        # Select the touched item
+        select_row(self.ids.history_list, self.selected_index, index)
         if index is not None:
-            self.ids.history_list.data[index]['selected'] = True
             self.selected_index = index
-        
-        # Refresh the view
-        self.ids.history_list.refresh_from_data()
 
     def load_selected_file(self):
         """Load the selected game file and show history in a text screen"""
@@ -500,14 +423,20 @@ class HistoryScreen(Screen):
                 return
                 
             selected_file = self.ids.history_list.data[self.selected_index]['text']
-            game_data = self.game_history.load_game(selected_file)
-            
-            # Format the game data into text
-            formatted_text = self.format_game_data(game_data)
-            self.show_message('Game History', formatted_text)
-            
         except Exception as e:
             self.show_message('Error', f'Failed to load game:\n{str(e)}')
+            return
+
+        def work(task):
+            # Format the game data into text
+            return self.format_game_data(self.game_history.load_game(selected_file))
+
+        self.status_text = 'Loading...'
+        self.run_task(
+            work,
+            on_result=lambda text: self.show_message('Game History', text),
+            on_error=lambda e: self.show_message('Error', f'Failed to load game:\n{str(e)}')
+        )
 
     def replay_selected_file(self):
         """Replay the selected game file"""
@@ -516,35 +445,78 @@ class HistoryScreen(Screen):
             
         try:
             selected_file = self.ids.history_list.data[self.selected_index]['text']
-            game_data = self.game_history.load_game(selected_file)
-            
-            
+        except Exception as e:
+            self.show_message('Error', f'Failed to load replay:\n{str(e)}')
+            return
+
+        self.status_text = 'Loading...'
+        self.run_task(
+            lambda task: self.game_history.load_game(selected_file),
+            on_result=self.start_replay,
+            on_error=lambda e: self.show_message('Error', f'Failed to load replay:\n{str(e)}')
+        )
+
+    def start_replay(self, game_data):
+        """Show the replay screen for loaded game data"""
+        try:
             # Initialize replay screen
             replay_screen = self.manager.get_screen('replay')
             replay_screen.initialize_replay(game_data)
             self.manager.current = 'replay'
-            
         except Exception as e:
             self.show_message('Error', f'Failed to load replay:\n{str(e)}')
 
-    def export_history(self):
-        """Export game history to a zip file"""
-        zip_path, error = self.game_history.export_history()
-        
+    def export_history(self, full=False):
+        """Export new games, or all games if full is True, to a zip file in the background"""
+        self.status_text = 'Exporting...'
+        self.run_task(
+            lambda task: self.game_history.export_history(full=full, progress=task.progress),
+            on_progress=lambda done, total: setattr(self, 'status_text', f'Exporting {done}/{total}'),
+            on_result=self.show_export_result,
+            on_error=lambda e: self.show_message('Error', f'Failed to export history:\n{str(e)}')
+        )
+
+    def show_export_result(self, result):
+        zip_path, error = result
+        self.status_text = ''
         if zip_path:
             self.show_message('Success', f'History exported to:\n{zip_path}')
-        else:
+        elif error:
             self.show_message('Error', f'Failed to export history:\n{error}')
+        else:
+            self.show_message('Export', 'No new or changed games since the last export.')
 
     def import_history(self):
-        """Import game history from a zip file"""
-        zip_path, error = self.game_history.import_history()
-        
-        if zip_path:
-            # Refresh the history list
-            self.list_history_files()
-        else:
+        """Import game history from a zip file in the background"""
+        self.status_text = 'Importing...'
+        self.run_task(
+            lambda task: self.game_history.import_history(progress=task.progress),
+            on_progress=lambda done, total: setattr(self, 'status_text', f'Importing {done}/{total}'),
+            on_result=self.show_import_result,
+            on_error=lambda e: self.show_message('Error', f'Failed to import history:\n{str(e)}')
+        )
+
+    def show_import_result(self, result):
+        summary, error = result
+        self.status_text = ''
+        if not summary:
             self.show_message('Error', f'Failed to import history:\n{error}')
+            return
+
+        # Show the message first; on_enter lists the games again once the user is back
+        self.query = None
+        self.ids.history_list.data = []
+        self.selected_index = None
+        sources = summary['zip_path']
+        if len(summary['zip_paths']) > 1:
+            sources = f"{len(summary['zip_paths'])} archives, the newest\n{sources}"
+        message = (f"Imported from:\n{sources}\n\n"
+                   f"New games: {summary['new']}\n"
+                   f"Already present: {summary['duplicate']}\n"
+                   f"Conflicts: {summary['conflict']}")
+        if summary['conflicts']:
+            message += '\n\nKept the local version of:\n' + '\n'.join(summary['conflicts'])
+        self.show_message('Import', message)
 
     def delete_game(self):
         """Delete the selected game file"""
@@ -576,7 +548,162 @@ class HistoryScreen(Screen):
             self.delete_game
         )
 
-class ReplayScreen(Screen):
+class PerfOverlay(BoxLayout):
+    """Debug overlay with tap-to-render latency and frame times, shown while metrics are enabled"""
+    REFRESH_INTERVAL = 0.5
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._events = []
+        self.message = ''
+
+    def start(self):
+        # An interval of 0 runs every frame, dt is the time since the previous one
+        self._events = [
+            Clock.schedule_interval(lambda dt: metrics.record('ui.frame', dt * 1e6), 0),
+            Clock.schedule_interval(lambda dt: self.refresh(), self.REFRESH_INTERVAL),
+        ]
+        self.refresh()
+
+    def stop(self):
+        for event in self._events:
+            event.cancel()
+        self._events = []
+
+    def refresh(self):
+        lines = []
+        tap = metrics.summary('ui.tap_to_render')
+        if tap:
+            lines.append(f"tap→render p50 {tap['p50_us'] / 1000:.1f} p90 {tap['p90_us'] / 1000:.1f} "
+                         f"max {tap['max_us'] / 1000:.1f} ms ({tap['count']})")
+        frame = metrics.summary('ui.frame')
+        if frame and frame['mean_us']:
+            lines.append(f"frame {frame['mean_us'] / 1000:.1f} ms, {1e6 / frame['mean_us']:.0f} fps, "
+                         f"p99 {frame['p99_us'] / 1000:.1f} max {frame['max_us'] / 1000:.1f} ms")
+        self.ids.stats_label.text = self.message or '\n'.join(lines)
+        self.message = ''
+
+    def dump(self):
+        filepath, error = App.get_running_app().dump_metrics()
+        self.message = f"Saved {os.path.basename(filepath)}" if filepath else f"Dump failed: {error}"
+        self.refresh()
+
+
+class GameDisplay:
+    """Scoreboard drawing shared by GameScreen and ReplayScreen
+
+    Remembers the game state it drew last and only updates the widgets of
+    players and sectors that changed since, so a tap touches a few labels
+    instead of every indicator on the board.
+    """
+    # Show a negative score difference in orange
+    color_diffs = False
+    perf_overlay = None
+
+    def on_enter(self, *args):
+        super().on_enter(*args)
+        self.show_perf_overlay(metrics.enabled)
+
+    def on_leave(self, *args):
+        super().on_leave(*args)
+        self.show_perf_overlay(False)
+
+    def show_perf_overlay(self, show):
+        """Add or remove the PerfOverlay"""
+        if show and self.perf_overlay is None:
+            self.perf_overlay = PerfOverlay()
+            self.add_widget(self.perf_overlay)
+            self.perf_overlay.start()
+        elif not show and self.perf_overlay is not None:
+            self.perf_overlay.stop()
+            self.remove_widget(self.perf_overlay)
+            self.perf_overlay = None
+
+    def record_render_latency(self, name, start):
+        """Record the time from start (a perf_counter_ns value) until the changed display is drawn"""
+        # Callbacks scheduled now run at the start of the next frame, after this one was drawn
+        Clock.schedule_once(lambda dt: metrics.record(name, (perf_counter_ns() - start) // 1000))
+
+    def reset_display(self):
+        """Forget the drawn state so the next update redraws everything, e.g. after rebuilding widgets"""
+        self.displayed_state = None
+
+    @metrics.timed('display.update')
+    def update_display(self):
+        """Bring the widgets in line with the game
+
+        Returns:
+            The StateChanges that were drawn, or None if there is no game
+        """
+        if not self.game:
+            return None
+        if self.displayed_state is None:
+            # Full redraw
+            self.ids.player1_name.text = self.game.players[0].name
+            self.ids.player2_name.text = self.game.players[1].name
+        changes = self.game.changes_since(self.displayed_state)
+        self.displayed_state = self.game.snapshot()
+        players = self.game.players
+
+        # Update scores and MPR of the players that changed
+        for idx in changes.players:
+            self.ids[f'player{idx + 1}_score'].text = str(players[idx].score)
+            self.ids[f'player{idx + 1}_mpr'].text = f"MPR: {players[idx].mpr:.2f}"
+
+        if changes.players:
+            # Update rounds display
+            self.ids.rounds.text = f"R: {players[1].rounds}"
+
+            # Calculate and update differences
+            p1_diff = players[0].score - players[1].score
+            p2_diff = -p1_diff
+
+            # Format diffs with brackets and explicit sign
+            self.ids.player1_diff.text = f"({'+' if p1_diff > 0 else '-' if p1_diff == 0 else ''}{p1_diff})"
+            self.ids.player2_diff.text = f"({'+' if p2_diff > 0 else '-' if p2_diff == 0 else ''}{p2_diff})"
+            if self.color_diffs:
+                # set the text color to orange if the diff is negative, and white otherwise
+                self.ids.player1_diff.color = SectorButton.ORANGE if p1_diff < 0 else SectorButton.WHITE
+                self.ids.player2_diff.color = SectorButton.ORANGE if p2_diff < 0 else SectorButton.WHITE
+
+        current = self.game.current_player
+        opponent = 1 - current
+        if changes.switched:
+            # Update player backgrounds based on current player (dark theme)
+            self.ids.player1_container.background_color = [0.2, 0.5, 0.2, 1] if current == 0 else [0.18, 0.18, 0.18, 1]
+            self.ids.player2_container.background_color = [0.2, 0.5, 0.2, 1] if current == 1 else [0.18, 0.18, 0.18, 1]
+            # Button states are relative to the current player, so all of them change
+            button_sectors = self.sector_buttons.keys()
+        else:
+            button_sectors = changes.sectors[0] | changes.sectors[1]
+        metrics.count('display.sector_buttons', len(button_sectors))
+
+        for sector in button_sectors:
+            if sector not in self.sector_buttons:
+                continue
+
+            current_hits = players[current].sectors[sector]
+            opponent_hits = players[opponent].sectors[sector]
+
+            # Update button state from current player's perspective
+            if current_hits >= 3 and opponent_hits >= 3:
+                self.sector_buttons[sector].sector_state = 'closed'  # Sector is closed (both players have 3 marks)
+            elif current_hits >= 3 and opponent_hits < 3:
+                self.sector_buttons[sector].sector_state = 'player_open'  # Sector is open for current player
+            elif opponent_hits >= 3 and current_hits < 3:
+                self.sector_buttons[sector].sector_state = 'opponent_open'  # Sector is open for opponent
+            else:
+                self.sector_buttons[sector].sector_state = 'normal'  # Sector is not open for either player
+
+        # Update scoring indicators with current round hits per sector
+        for idx, indicators in enumerate((self.p1_indicators, self.p2_indicators)):
+            player = players[idx]
+            for sector in changes.sectors[idx]:
+                if sector in indicators:
+                    indicators[sector].update_marks(player.sectors[sector], player.current_round_sector_hits[sector])
+        return changes
+
+class ReplayScreen(GameDisplay, Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.game = None
@@ -588,7 +715,13 @@ class ReplayScreen(Screen):
         self.is_replay_finished = False
         self.is_paused = False
         self.pause_duration = 1.0  # Default pause duration in seconds
+        # Replay positions as (round, mark) pairs and game snapshots at the start of each round
+        self.positions = []
+        self.position_index = 0
+        self.keyframes = []
+        self._moving_slider = False
         # Initialize dictionaries for sector buttons and indicators
+        self.displayed_state = None
         self.sector_buttons = {}
         self.p1_indicators = {}
         self.p2_indicators = {}
@@ -605,7 +738,7 @@ class ReplayScreen(Screen):
             # Resume the replay
             self.is_paused = False
             self.ids.pause_button.text = '⏸️'
-            self.ids.step_back_button.disabled = False # TODO: enable when implemented working back button 
+            self.ids.step_back_button.disabled = True
             self.ids.step_forward_button.disabled = True
             self.replay_event = Clock.schedule_interval(self.replay_next_mark, self.pause_duration)
         else:
@@ -621,97 +754,14 @@ class ReplayScreen(Screen):
         """Step forward one mark in the replay"""
         if not self.is_paused or not self.is_replaying:
             return
-            
-        if self.current_round >= len(self.game_history):
-            return
-            
-        current_round = self.game_history[self.current_round]
-        
-        if self.current_mark >= len(current_round):
-            # Move to next round
-            self.current_round += 1
-            self.current_mark = 0
-            if self.current_round < len(self.game_history):
-                self.game.switch_player()
-                self.ids.progress_label.text = f"Replaying round {self.current_round + 1}/{len(self.game_history)}"
-            else:
-                self.ids.stop_button.text = '🚪'
-                self.is_replay_finished = True
-            return
-            
-        # Replay the current mark
-        mark = current_round[self.current_mark]
-        self.game.add_hit(mark['sector'])
-        self.current_mark += 1
-        self.update_display()
+        self.advance()
 
     def step_backward(self):
-        """Step backward one mark in the replay
-        Does not work:
-         - does not remove checkmarks from older rounds.
-         - I dont see the tick marks disappearing going backwards. 
-         - I dont see the marks dots appear all at once and disappear one by one going backwards.
-        """
-        # if not self.is_paused or not self.is_replaying:
-        #     return
-            
-        # if self.current_round < 0:
-        #     return
-            
-        # current_round = self.game_history[self.current_round]
-        
-        
-        # if self.current_mark <= 0:
-        #     # Move to previous round
-        #     if self.current_round > 0:
-        #         # Get the previous round from history
-        #         previous_round = self.game_history[self.current_round - 1]
-                
-        #         # Undo all marks in current round
-        #         while self.game.current_round_marks[-1]:
-        #             self.game.undo_last_mark()
-                
-        #         # Remove the empty current round
-        #         self.game.current_round_marks.pop()
-                
-        #         # Switch back to previous player
-        #         self.current_round -= 1
-        #         self.game.switch_player()
-                
-        #         # Decrement rounds for the current player (since we're going back)
-        #         self.game.players[self.game.current_player].rounds -= 1
-                
-        #         # Restore previous player's round
-        #         self.game.current_round_marks.append(previous_round)
-                
-        #         # Restore previous player's state
-        #         current = self.game.players[self.game.current_player]
-        #         current.marks_this_round = len(previous_round)
-        #         current.sectors_hit_this_round.clear()
-        #         current.current_round_sector_hits = {str(i): 0 for i in range(self.game.lowest_sector, self.game.highest_sector + 1)}
-        #         current.current_round_sector_hits['Bull'] = 0
-                
-        #         # Restore sector hits from previous round
-        #         for mark in previous_round:
-        #             sector = mark['sector']
-        #             current.current_round_sector_hits[sector] += 1
-        #             current.sectors_hit_this_round.add(sector)
-                
-        #         # Update MPR
-        #         current.mpr = current.calculate_mpr()
-                
-        #         # Set current mark to the last mark in previous round
-        #         self.current_mark = len(previous_round) - 1
-        #         self.ids.progress_label.text = f"Replaying round {self.current_round + 1}/{len(self.game_history)}"
-        #     else:
-        #         return
-        # else:
-        #     # Undo the current mark
-        #     mark = current_round[self.current_mark]
-        #     self.game.undo_last_mark()
-        #     self.current_mark -= 1
-            
-        self.update_display()
+        """Step backward one mark in the replay"""
+        if not self.is_paused or not self.is_replaying:
+            return
+        if self.position_index > 0:
+            self.seek(self.position_index - 1)
 
     def update_replay_speed(self):
         """Update the pause duration when the speed setting changes"""
@@ -739,6 +789,7 @@ class ReplayScreen(Screen):
         
         # Store the history for replay
         self.game_history = game_data['history']
+        self.build_keyframes()
         
         # Initialize the UI
         self.create_sector_buttons()
@@ -752,17 +803,42 @@ class ReplayScreen(Screen):
         self.ids.step_back_button.disabled = True
         self.ids.step_forward_button.disabled = True
         self.ids.replay_speed.text = str(self.pause_duration)
+        self._moving_slider = True
+        self.ids.replay_slider.max = max(len(self.positions) - 1, 1)
+        self.ids.replay_slider.value = 0
+        self._moving_slider = False
         
         # Start the replay
         self.start_replay()
 
+    def build_keyframes(self):
+        """Precompute a game snapshot at the start of every round
+
+        Any replay position can then be reached by restoring the round's
+        snapshot and replaying at most one round of marks.
+        """
+        self.positions = []
+        self.keyframes = []
+        for round_idx, round_marks in enumerate(self.game_history):
+            if round_idx > 0:
+                self.game.switch_player()
+            self.keyframes.append(self.game.snapshot())
+            for mark_idx, mark in enumerate(round_marks):
+                self.positions.append((round_idx, mark_idx))
+                self.game.add_hit(mark['sector'])
+            # The position after the last mark of a round, before switching players
+            self.positions.append((round_idx, len(round_marks)))
+        if self.keyframes:
+            self.game.restore(self.keyframes[0])
+
     def start_replay(self):
         """Start the replay animation"""
         self.is_replaying = True
         self.current_round = 0
         self.current_mark = 0
+        self.position_index = 0
         self.replay_event = Clock.schedule_interval(self.replay_next_mark, self.pause_duration)
-        self.ids.progress_label.text = f"Replaying round {self.current_round + 1}/{len(self.game_history)}"
+        self.update_progress()
 
     def stop_replay(self):
         """Stop the replay animation and clock"""
@@ -774,32 +850,60 @@ class ReplayScreen(Screen):
 
     def replay_next_mark(self, dt):
         """Replay the next mark in the sequence"""
-        if not self.is_replaying or self.current_round >= len(self.game_history):
-            #keep the replay screen on and dont call stop_replay()
-            self.ids.stop_button.text = '⬆️'
-            self.is_replay_finished = True
+        if not self.is_replaying:
             return
+        self.advance()
 
-        current_round = self.game_history[self.current_round]
-        
-        if self.current_mark >= len(current_round):
-            # Move to next round
-            self.current_round += 1
-            self.current_mark = 0
-            if self.current_round < len(self.game_history):
-                self.game.switch_player()
-                self.ids.progress_label.text = f"Replaying round {self.current_round + 1}/{len(self.game_history)}"
-            else:
-                #keep the replay screen on and dont call stop_replay()
-                self.ids.stop_button.text = '⬆️'
-                self.is_replay_finished = True
+    def advance(self):
+        """Move one position forward: the next mark, or the switch to the next round"""
+        if self.position_index >= len(self.positions) - 1:
+            #keep the replay screen on and dont call stop_replay()
+            self.set_finished(True)
             return
 
-        # Replay the current mark
-        mark = current_round[self.current_mark]
-        self.game.add_hit(mark['sector'])
-        self.current_mark += 1
+        next_round, next_mark = self.positions[self.position_index + 1]
+        if next_round != self.current_round:
+            self.game.switch_player()
+        else:
+            mark = self.game_history[self.current_round][self.current_mark]
+            self.game.add_hit(mark['sector'])
+        self.current_round, self.current_mark = next_round, next_mark
+        self.position_index += 1
         self.update_display()
+        self.update_progress()
+
+    def seek(self, index):
+        """Jump to any replay position from the nearest round keyframe"""
+        if not self.positions:
+            return
+        index = max(0, min(int(index), len(self.positions) - 1))
+        round_idx, mark_idx = self.positions[index]
+        self.game.restore(self.keyframes[round_idx])
+        for mark in self.game_history[round_idx][:mark_idx]:
+            self.game.add_hit(mark['sector'])
+        self.current_round, self.current_mark = round_idx, mark_idx
+        self.position_index = index
+        self.set_finished(index >= len(self.positions) - 1)
+        self.update_display()
+        self.update_progress()
+
+    def on_slider_value(self, value):
+        """Seek when the user drags the replay slider"""
+        if self._moving_slider or not self.is_replaying:
+            return
+        if int(value) != self.position_index:
+            self.seek(value)
+
+    def set_finished(self, finished):
+        self.is_replay_finished = finished
+        self.ids.stop_button.text = '⬆️' if finished else '⏹️'
+
+    def update_progress(self):
+        """Show the current round and move the slider to the current position"""
+        self.ids.progress_label.text = f"Replaying round {self.current_round + 1}/{len(self.game_history)}"
+        self._moving_slider = True
+        self.ids.replay_slider.value = self.position_index
+        self._moving_slider = False
 
     def create_sector_buttons(self):
         # Clear existing sector buttons
@@ -810,6 +914,7 @@ class ReplayScreen(Screen):
         self.sector_buttons.clear()
         self.p1_indicators.clear()
         self.p2_indicators.clear()
+        self.reset_display()
         
         # Add sector buttons in reverse order (highest to lowest)
         for sector in range(self.game.highest_sector, self.game.lowest_sector - 1, -1):
@@ -859,73 +964,7 @@ class ReplayScreen(Screen):
         game_grid.add_widget(bull_btn)
         game_grid.add_widget(p2_bull)
 
-    def update_display(self):
-        if not self.game:
-            return
-
-        # Update player names and scores
-        self.ids.player1_name.text = self.game.players[0].name
-        self.ids.player2_name.text = self.game.players[1].name
-        self.ids.player1_score.text = str(self.game.players[0].score)
-        self.ids.player2_score.text = str(self.game.players[1].score)
-        self.ids.player1_mpr.text = f"MPR: {self.game.players[0].mpr:.2f}"
-        self.ids.player2_mpr.text = f"MPR: {self.game.players[1].mpr:.2f}"
-       
-        # Update rounds display
-        self.ids.rounds.text = f"R: {self.game.players[1].rounds}"
-        
-        # Calculate and update differences
-        p1_score = self.game.players[0].score
-        p2_score = self.game.players[1].score
-        p1_diff = p1_score - p2_score
-        p2_diff = p2_score - p1_score
-        
-        # Format diffs with brackets and explicit sign
-        self.ids.player1_diff.text = f"({'+' if p1_diff > 0 else '-' if p1_diff == 0 else ''}{p1_diff})"
-        self.ids.player2_diff.text = f"({'+' if p2_diff > 0 else '-' if p2_diff == 0 else ''}{p2_diff})"
-        
-        # Update player backgrounds based on current player (dark theme)
-        p1_bg = [0.2, 0.5, 0.2, 1] if self.game.current_player == 0 else [0.18, 0.18, 0.18, 1]
-        p2_bg = [0.2, 0.5, 0.2, 1] if self.game.current_player == 1 else [0.18, 0.18, 0.18, 1]
-        
-        # Update container backgrounds using the property
-        self.ids.player1_container.background_color = p1_bg
-        self.ids.player2_container.background_color = p2_bg
-        
-        # Update sector buttons and indicators
-        current = self.game.current_player
-        opponent = 1 - current
-        
-        # Create list of all sectors including Bull
-        sectors = [str(i) for i in range(self.game.highest_sector, self.game.lowest_sector - 1, -1)]
-        sectors.append('Bull')
-        
-        # Update all sector buttons and indicators in a single iteration
-        for sector in sectors:
-            if sector not in self.sector_buttons:
-                continue
-                
-            current_hits = self.game.players[current].sectors[sector]
-            opponent_hits = self.game.players[opponent].sectors[sector]
-            
-            # Update button state from current player's perspective
-            if current_hits >= 3 and opponent_hits >= 3:
-                self.sector_buttons[sector].sector_state = 'closed'  # Sector is closed (both players have 3 marks)
-            elif current_hits >= 3 and opponent_hits < 3:
-                self.sector_buttons[sector].sector_state = 'player_open'  # Sector is open for current player
-            elif opponent_hits >= 3 and current_hits < 3:
-                self.sector_buttons[sector].sector_state = 'opponent_open'  # Sector is open for opponent
-            else:
-                self.sector_buttons[sector].sector_state = 'normal'  # Sector is not open for either player
-            
-            # Update scoring indicators with current round hits per sector
-            p1_current_hits = self.game.players[0].current_round_sector_hits[sector]
-            p2_current_hits = self.game.players[1].current_round_sector_hits[sector]
-            
-            self.p1_indicators[sector].update_marks(self.game.players[0].sectors[sector], p1_current_hits)
-            self.p2_indicators[sector].update_marks(self.game.players[1].sectors[sector], p2_current_hits)
-
-class PlayerStatsScreen(Screen):
+class PlayerStatsScreen(TaskScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.game_history = GameHistory()
@@ -940,112 +979,33 @@ class PlayerStatsScreen(Screen):
 
     def select_with_touch(self, index, touch):
         """Handle selection of items in the RecycleView"""
-        # Deselect all items
-        for item in self.ids.player_list.data:
-            item['selected'] = False
-        
-        # Select the touched item
+        select_row(self.ids.player_list, self.selected_index, index)
         if index is not None:
-            self.ids.player_list.data[index]['selected'] = True
             self.selected_index = index
-        
-        # Refresh the view
-        self.ids.player_list.refresh_from_data()
 
     def load_player_stats(self):
-        """Load and calculate player statistics from game history"""
-        try:
-            # Get all game files
-            files = self.game_history.get_history_files()
-            
-            # Initialize player stats dictionary
-            self.player_stats = {}
-            
-            # Process each game file
-            for file in files:
-                game_data = self.game_history.load_game(file)
-                if not game_data:
-                    continue
-                    
-                # Process each player in the game
-                for player in game_data['players']:
-                    name = player['name']
-                    if name not in self.player_stats:
-                        self.player_stats[name] = {
-                            'games_played': 0,
-                            'games_won': 0,
-                            'total_rounds': 0,
-                            'min_rounds': float('inf'),
-                            'max_rounds': 0,
-                            'total_mpr': 0,
-                            'min_mpr': float('inf'),
-                            'max_mpr': 0,
-                            'sector_hits': {},
-                            'sector_games': {},  # Track games played per sector
-                            'total_sector_hits': 0
-                        }
-                    
-                    stats = self.player_stats[name]
-                    stats['games_played'] += 1
-                    
-                    # Calculate rounds in this game
-                    rounds = int((len(game_data['history']) + 1) / 2)
-                    stats['total_rounds'] += rounds
-                    stats['min_rounds'] = min(stats['min_rounds'], rounds)
-                    stats['max_rounds'] = max(stats['max_rounds'], rounds)
-                    
-                    # Track MPR
-                    mpr = player['mpr']
-                    stats['total_mpr'] += mpr
-                    stats['min_mpr'] = min(stats['min_mpr'], mpr)
-                    stats['max_mpr'] = max(stats['max_mpr'], mpr)
-                    
-                    # Track sector hits and games played per sector
-                    sectors_hit_in_game = set()  # Track unique sectors hit in this game
-                    for round_marks in game_data['history']:
-                        for mark in round_marks:
-                            if mark['player'] == game_data['players'].index(player):
-                                sector = mark['sector']
-                                if sector not in stats['sector_hits']:
-                                    stats['sector_hits'][sector] = 0
-                                    stats['sector_games'][sector] = 0
-                                stats['sector_hits'][sector] += 1
-                                sectors_hit_in_game.add(sector)
-                                stats['total_sector_hits'] += 1
-                    
-                    # Increment games played for each sector hit in this game
-                    for sector in sectors_hit_in_game:
-                        stats['sector_games'][sector] += 1
-                    
-                    # Track wins
-                    if game_data['winner']['name'] == name:
-                        stats['games_won'] += 1
-            
-            # Calculate averages and format stats for display
-            for name, stats in self.player_stats.items():
-                if stats['games_played'] > 0:
-                    stats['avg_rounds'] = stats['total_rounds'] / stats['games_played']
-                    stats['avg_mpr'] = stats['total_mpr'] / stats['games_played']
-                    stats['win_rate'] = stats['games_won'] / stats['games_played'] * 100
-                    
-                    # Calculate average hits per game for each sector
-                    stats['sector_avgs'] = {}
-                    for sector in stats['sector_hits']:
-                        if stats['sector_games'][sector] > 0:
-                            stats['sector_avgs'][sector] = stats['sector_hits'][sector] / stats['sector_games'][sector]
-                    
-                    # Find most and least hit sectors
-                    if stats['sector_hits']:
-                        stats['most_hit_sector'] = max(stats['sector_hits'].items(), key=lambda x: x[1])[0]
-                        stats['least_hit_sector'] = min(stats['sector_hits'].items(), key=lambda x: x[1])[0]
-            
-            # Update the player list
-            self.ids.player_list.data = [
-                {'text': name, 'selected': False} for name in self.player_stats.keys()
-            ]
-            
-        except Exception as e:
-            self.show_message('Error', f'Failed to load player stats:\n{str(e)}')
+        """Load player statistics from the persisted stats index in the background"""
+        self.cancel_tasks()
+        self.player_stats = {}
+        self.ids.player_list.data = []
+        self.selected_index = None
+        self.status_text = 'Loading...'
+        # Rebuild in this process, where it holds the history's write lock against concurrent saves;
+        # leaving the screen cancels the task and stops the rebuild at the next file
+        self.run_task(
+            lambda task: player_stats_summary(self.game_history.base_dir, task.progress),
+            on_result=self.show_player_stats,
+            on_error=lambda e: self.show_message('Error', f'Failed to load player stats:\n{str(e)}')
+        )
+
+    def show_player_stats(self, player_stats):
+        self.player_stats = player_stats
+        self.status_text = ''
+
+        # Update the player list; stats are gathered in directory order, so sort by name
+        self.ids.player_list.data = [
+            {'text': name, 'selected': False} for name in sorted(self.player_stats, key=str.lower)
+        ]
 
     def show_player_details(self):
         """Show detailed statistics for the selected player"""
@@ -1187,12 +1147,16 @@ class DataInputScreen(Screen):
         stats_screen.load_player_stats()
         self.manager.current = 'player_stats'
 
-class GameScreen(Screen):
+class GameScreen(GameDisplay, Screen):
+    color_diffs = True
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.game = None
         self.game_history = GameHistory()
+        self.journal = MarkJournal(self.game_history.base_dir)
         # Initialize dictionaries for sector buttons and indicators
+        self.displayed_state = None
         self.sector_buttons = {}
         self.p1_indicators = {}
         self.p2_indicators = {}
@@ -1204,9 +1168,39 @@ class GameScreen(Screen):
     def initialize_game(self, game):
         """Initialize a new game"""
         self.game = game
+        self.journal.start(game)
         self.create_sector_buttons()
         self.update_display()
 
+    def offer_resume(self):
+        """Offer to resume a match that was interrupted before it was saved"""
+        game = self.journal.recover(CricketGame) if self.journal.exists() else None
+        if not game:
+            return
+
+        if game.game_over:
+            # The app stopped between game over and saving, so just save it now
+            self.save_in_background(game, False, "Game saved to:", "Error saving game:")
+            return
+
+        text_screen = self.manager.get_screen('message')
+        text_screen.show_message(
+            'Resume Match',
+            f'An unfinished match was found:\n{game.players[0].name} vs {game.players[1].name}\n\nPress OK to resume or Back to skip.',
+            lambda: self.resume_game(game),
+            caller_screen='data_input'
+        )
+        self.manager.current = 'message'
+
+    def resume_game(self, game):
+        """Continue a match recovered from the journal"""
+        self.game = game
+        self.journal.resume(game)
+        self.create_sector_buttons()
+        self.update_display()
+        # The message screen returns to data_input after this callback, so switch afterwards
+        Clock.schedule_once(lambda dt: setattr(self.manager, 'current', 'game'))
+
     def create_sector_buttons(self):
         # Clear existing sector buttons
         game_grid = self.ids.game_grid
@@ -1216,6 +1210,7 @@ class GameScreen(Screen):
         self.sector_buttons.clear()
         self.p1_indicators.clear()
         self.p2_indicators.clear()
+        self.reset_display()
         
         # Add sector buttons in reverse order (highest to lowest)
         for sector in range(self.game.highest_sector, self.game.lowest_sector - 1, -1):
@@ -1265,6 +1260,7 @@ class GameScreen(Screen):
         game_grid.add_widget(bull_btn)
         game_grid.add_widget(p2_bull)
 
+    @metrics.timed('game.on_sector_press')
     def on_sector_press(self, sector):
         if not self.game:
             return
@@ -1273,9 +1269,13 @@ class GameScreen(Screen):
         if current_player.marks_this_round >= 9:
             return
             
-        if self.game.add_hit(sector):
+        tapped = perf_counter_ns() if metrics.enabled else 0
+        if metrics.call('engine.add_hit', self.game.add_hit, sector):
             self.update_display()
+            if tapped:
+                self.record_render_latency('ui.tap_to_render', tapped)
 
+    @metrics.timed('game.next_player')
     def next_player(self, *args):
         if not self.game:
             return
@@ -1288,8 +1288,11 @@ class GameScreen(Screen):
             return
         else:    
             # Check for game over after switching players
+            tapped = perf_counter_ns() if metrics.enabled else 0
             self.game.switch_player()
             self.update_display()
+            if tapped:
+                self.record_render_latency('ui.next_player_to_render', tapped)
             
             self.game.check_game_over()
 
@@ -1304,18 +1307,54 @@ class GameScreen(Screen):
                 self.ids.undo_mark_btn.disabled = True
                 self.ids.undo_throw_btn.disabled = True
 
-                 # Save game history
-                filepath, error = self.game_history.save_game(self.game)
-                if filepath:
-                    self.ids.file_messages_label.color = [0, 1, 0, 1] # green
-                    # make it two lines so it is readable on android
-                    two_line_path = '\n'.join(filepath[i:i+len(filepath)//2] for i in range(0, len(filepath), len(filepath)//2)) 
-                    self.ids.file_messages_label.text = f"Game saved to:{two_line_path}"
-                else:
-                    self.ids.file_messages_label.color = [1, 0, 0, 1]
-                    self.ids.file_messages_label.text = f"Error saving game:\n{error}"
+                # Save game history in the background, so a slow write never holds up the screen
+                self.ids.file_messages_label.color = [0.9, 0.9, 0.9, 1]
+                self.ids.file_messages_label.text = "Saving game..."
+                self.save_in_background(self.game, False, "Game saved to:", "Error saving game:")
                 return  
 
+    def save_in_background(self, game, aborted, saved_text, failed_text):
+        """Save a copy of game on the app's SaveQueue and report the outcome
+
+        The journal is only discarded once the file is written, so a game whose
+        save is still failing when the app stops is offered again on restart.
+        A save that cannot succeed by retrying, e.g. a drawn game, discards it
+        too, so the game is not offered on every start.
+        """
+        snapshot = game.fork()
+        pending = []
+
+        def work():
+            try:
+                if not pending:
+                    # Name and build the file once, so a retry rewrites it rather than adding a second one
+                    pending.append(prepare_game(snapshot, aborted))
+                filepath = self.game_history.write_game(pending[0])
+            except OSError:
+                raise  # Retried by the queue
+            except Exception:
+                self.journal.discard(game)
+                raise
+            # Discard right away rather than in a UI callback, which may never run if the app is stopped
+            self.journal.discard(game)
+            return filepath
+
+        def showing():
+            return self.manager.current == 'game' and self.game is game
+
+        def on_saved(filepath):
+            if showing():
+                self.ids.file_messages_label.color = [0, 1, 0, 1] # green
+                self.ids.file_messages_label.text = f"{saved_text}\n{two_line_text(filepath)}"
+
+        def on_failed(error, retry_in):
+            if showing():
+                self.ids.file_messages_label.color = [1, 0, 0, 1]
+                retrying = f"\nRetrying in {retry_in}s" if retry_in is not None else ""
+                self.ids.file_messages_label.text = f"{failed_text}\n{error}{retrying}"
+
+        App.get_running_app().saves.submit(work, on_saved, on_failed)
+
     def update_undo_button_states(self):
         """Update the enabled/disabled state of undo buttons based on game state"""
         if not self.game:
@@ -1324,86 +1363,20 @@ class GameScreen(Screen):
             return
 
         # Enable/disable Undo a Hit button based on current round marks
-        has_current_marks = bool(self.game.current_round_marks and self.game.current_round_marks[-1])
-        self.ids.undo_mark_btn.disabled = not has_current_marks
+        self.ids.undo_mark_btn.disabled = not self.game.can_undo_mark()
 
         # Enable/disable Undo Prev Throw button based on history
-        has_previous_rounds = bool(self.game.mark_history)
-        self.ids.undo_throw_btn.disabled = not has_previous_rounds
+        self.ids.undo_throw_btn.disabled = not self.game.can_undo_throw()
 
     def update_display(self):
-        if not self.game:
+        changes = super().update_display()
+        if not changes:
             return
 
-        # Update player names and scores
-        self.ids.player1_name.text = self.game.players[0].name
-        self.ids.player2_name.text = self.game.players[1].name
-        self.ids.player1_score.text = str(self.game.players[0].score)
-        self.ids.player2_score.text = str(self.game.players[1].score)
-        self.ids.player1_mpr.text = f"MPR: {self.game.players[0].mpr:.2f}"
-        self.ids.player2_mpr.text = f"MPR: {self.game.players[1].mpr:.2f}"
-       
-        # Update rounds display
-        self.ids.rounds.text = f"R: {self.game.players[1].rounds}"
-        
-        # Calculate and update differences
-        p1_score = self.game.players[0].score
-        p2_score = self.game.players[1].score
-        p1_diff = p1_score - p2_score
-        p2_diff = p2_score - p1_score
-        
-        # Format diffs with brackets and explicit sign
-        self.ids.player1_diff.text = f"({'+' if p1_diff > 0 else '-' if p1_diff == 0 else ''}{p1_diff})"
-        self.ids.player2_diff.text = f"({'+' if p2_diff > 0 else '-' if p2_diff == 0 else ''}{p2_diff})"
-        # set the text color to orange if the diff is negative, and white otherwise 
-        self.ids.player1_diff.color = SectorButton.ORANGE if p1_diff < 0 else SectorButton.WHITE
-        self.ids.player2_diff.color = SectorButton.ORANGE if p2_diff < 0 else SectorButton.WHITE
-
-
-        # Update player backgrounds based on current player (dark theme)
-        p1_bg = [0.2, 0.5, 0.2, 1] if self.game.current_player == 0 else [0.18, 0.18, 0.18, 1]
-        p2_bg = [0.2, 0.5, 0.2, 1] if self.game.current_player == 1 else [0.18, 0.18, 0.18, 1]
-        
-        # Update container backgrounds using the property
-        self.ids.player1_container.background_color = p1_bg
-        self.ids.player2_container.background_color = p2_bg
-        
-        # Update sector buttons and indicators
-        current = self.game.current_player
-        opponent = 1 - current
-        
-        # Create list of all sectors including Bull
-        sectors = [str(i) for i in range(self.game.highest_sector, self.game.lowest_sector - 1, -1)]
-        sectors.append('Bull')
-        
-        # Update all sector buttons and indicators in a single iteration
-        for sector in sectors:
-            if sector not in self.sector_buttons:
-                continue
-                
-            current_hits = self.game.players[current].sectors[sector]
-            opponent_hits = self.game.players[opponent].sectors[sector]
-            
-            # Update button state from current player's perspective
-            if current_hits >= 3 and opponent_hits >= 3:
-                self.sector_buttons[sector].sector_state = 'closed'  # Sector is closed (both players have 3 marks)
-            elif current_hits >= 3 and opponent_hits < 3:
-                self.sector_buttons[sector].sector_state = 'player_open'  # Sector is open for current player
-            elif opponent_hits >= 3 and current_hits < 3:
-                self.sector_buttons[sector].sector_state = 'opponent_open'  # Sector is open for opponent
-            else:
-                self.sector_buttons[sector].sector_state = 'normal'  # Sector is not open for either player
-            
-            # Update scoring indicators with current round hits per sector
-            p1_current_hits = self.game.players[0].current_round_sector_hits[sector]
-            p2_current_hits = self.game.players[1].current_round_sector_hits[sector]
-            
-            self.p1_indicators[sector].update_marks(self.game.players[0].sectors[sector], p1_current_hits)
-            self.p2_indicators[sector].update_marks(self.game.players[1].sectors[sector], p2_current_hits)
-            
         # Update undo button states
-        self.ids.undo_mark_btn.text = f"Undo {self.game.players[self.game.current_player].name}'s marks"
-        self.ids.undo_throw_btn.text = f"Undo {self.game.players[1-self.game.current_player].name}'s marks"
+        if changes.switched:
+            self.ids.undo_mark_btn.text = f"Undo {self.game.players[self.game.current_player].name}'s marks"
+            self.ids.undo_throw_btn.text = f"Undo {self.game.players[1-self.game.current_player].name}'s marks"
         self.update_undo_button_states()
 
     def undo_last_mark(self, *args):
@@ -1441,19 +1414,10 @@ class GameScreen(Screen):
         if not self.game:
             return
 
-        # Save game with 'aborted' prefix using GameHistory
-        filepath, error = self.game_history.save_aborted_game(self.game)
-        
-        if filepath:
-            # Show success message
-            self.ids.file_messages_label.color = [0, 1, 0, 1]  # green
-            two_line_path = '\n'.join(filepath[i:i+len(filepath)//2] for i in range(0, len(filepath), len(filepath)//2))
-            self.ids.file_messages_label.text = f"Aborted game saved to:\n{two_line_path}"
-        else:
-            # Show error message
-            self.ids.file_messages_label.color = [1, 0, 0, 1]  # red
-            self.ids.file_messages_label.text = f"Failed to save aborted game: {error}"
-        
+        # Save game with 'aborted' prefix using GameHistory, in the background
+        self.ids.file_messages_label.color = [0.9, 0.9, 0.9, 1]
+        self.ids.file_messages_label.text = "Saving aborted game..."
+        self.save_in_background(self.game, True, "Aborted game saved to:", "Failed to save aborted game:")
 
         # essential to have this here, otherwise the message logic will set the current screen to game screen
         # and then the return_to_data_input will not set it to data_input screen
@@ -1467,6 +1431,16 @@ class GameScreen(Screen):
 
 class DartsCricketApp(App):
     def build(self):
+        # Performance metrics are off unless switched on here or by double tapping the title
+        if os.environ.get('WINDOW_CRICKET_METRICS'):
+            metrics.enable()
+        # Worker processes are not available on Android
+        self.tasks = TaskRunner(
+            lambda callback: Clock.schedule_once(lambda dt: callback()),
+            process_workers=0 if platform == 'android' else 1
+        )
+        # Game files are written on their own thread, one at a time, retrying failed writes
+        self.saves = SaveQueue(lambda callback: Clock.schedule_once(lambda dt: callback()))
         sm = ScreenManager()
         sm.add_widget(DataInputScreen(name='data_input'))
         sm.add_widget(GameScreen(name='game'))
@@ -1476,5 +1450,40 @@ class DartsCricketApp(App):
         sm.add_widget(PlayerStatsScreen(name='player_stats'))
         return sm
 
+    def on_start(self):
+        self.root.get_screen('game').offer_resume()
+
+    def on_pause(self):
+        # Android may kill a paused app, make sure the journal and pending saves are on disk
+        self.root.get_screen('game').journal.flush(sync=True)
+        self.saves.retry_now()
+        self.saves.wait(timeout=2)
+        return True
+
+    def on_stop(self):
+        self.root.get_screen('game').journal.close()
+        self.saves.retry_now()
+        self.saves.wait(timeout=5)
+        self.saves.stop()
+        self.tasks.shutdown()
+        if metrics.enabled:
+            self.dump_metrics()
+
+    def toggle_metrics(self):
+        """Switch performance metrics and the overlay on or off"""
+        metrics.enable(not metrics.enabled)
+        screen = self.root.current_screen
+        if isinstance(screen, GameDisplay):
+            screen.show_perf_overlay(metrics.enabled)
+
+    def dump_metrics(self):
+        """Write the metrics recorded so far to the perf directory of the history
+
+        Returns:
+            tuple: (file path, error message)
+        """
+        history = self.root.get_screen('game').game_history
+        return metrics.dump(os.path.join(history.base_dir, 'perf'))
+
 if __name__ == '__main__':
     DartsCricketApp().run() 
\ No newline at end of file
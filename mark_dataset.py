@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import csv
+from array import array
+from itertools import islice
+from atomic_file import write_file_atomic
+
+# Bump when the columns or their encoding change; older datasets are rebuilt
+MARK_DATASET_VERSION = 1
+
+# One row per mark: index into the game columns, turn (its index in the game
+# history, two turns per round), player 0/1, sector number with 25 for Bull,
+# scoring flag and points scored
+MARK_COLUMNS = (
+    ('game', 'I'),
+    ('turn', 'H'),
+    ('player', 'B'),
+    ('sector', 'B'),
+    ('scoring', 'B'),
+    ('points', 'B'),
+)
+
+# One row per game. timestamp is the YYYYMMDDHHMMSS number of when it was played,
+# player1/player2 index the player names, winner is -1 for aborted games and
+# first_mark is the row of the game's first mark
+GAME_COLUMNS = (
+    ('timestamp', 'Q'),
+    ('player1', 'I'),
+    ('player2', 'I'),
+    ('winner', 'b'),
+    ('score1', 'H'),
+    ('score2', 'H'),
+    ('mpr1', 'd'),
+    ('mpr2', 'd'),
+    ('highest_sector', 'B'),
+    ('lowest_sector', 'B'),
+    ('bull_points', 'B'),
+    ('rounds', 'H'),
+    ('first_mark', 'Q'),
+)
+
+# NumPy dtype of each array typecode, used as file extension so np.fromfile(path, dtype=ext) reads a column
+NUMPY_DTYPES = {'B': 'u1', 'b': 'i1', 'H': '<u2', 'I': '<u4', 'Q': '<u8', 'd': '<f8'}
+
+BULL_SECTOR = 25
+
+# Games parsed and written at a time while compiling the whole history
+REWRITE_BATCH_SIZE = 1000
+
+
+def encode_sector(sector):
+    return BULL_SECTOR if sector == 'Bull' else int(sector)
+
+
+def decode_sector(value):
+    return 'Bull' if value == BULL_SECTOR else str(value)
+
+
+class MarkDataset:
+    """Every mark of the history as flat little-endian column files
+
+    Each column is one raw binary file of fixed-width values, so NumPy reads
+    it with np.fromfile and analysis never parses game files. Games are
+    appended as they are saved. The row counts in meta.json are written last,
+    so readers ignore the tail of a column that an interrupted append left
+    behind, and the next append cuts it off.
+
+    The game filenames and player names are text files with one line per
+    game and per player.
+    """
+
+    def __init__(self, index_dir):
+        self.dir = os.path.join(index_dir, 'mark_dataset')
+        self.meta_path = os.path.join(self.dir, 'meta.json')
+        self.files_path = os.path.join(self.dir, 'files.txt')
+        self.players_path = os.path.join(self.dir, 'players.txt')
+
+    def column_path(self, table, name):
+        typecode = dict(MARK_COLUMNS if table == 'marks' else GAME_COLUMNS)[name]
+        return os.path.join(self.dir, f'{table}_{name}.{NUMPY_DTYPES[typecode].lstrip("<")}')
+
+    def load_meta(self):
+        """Return the stored row counts, or None if the dataset is missing or outdated"""
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != MARK_DATASET_VERSION:
+            return None
+        return meta
+
+    def exists(self):
+        return self.load_meta() is not None
+
+    def invalidate(self):
+        """Drop the dataset so it is compiled again from the history files"""
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+    def rewrite(self, games):
+        """Replace the dataset with the given games
+
+        Args:
+            games: Iterable of (filename, game_data, timestamp) tuples in the order to store them
+        """
+        os.makedirs(self.dir, exist_ok=True)
+        self.invalidate()
+        meta = {'version': MARK_DATASET_VERSION, 'games': 0, 'marks': 0, 'players': 0,
+                'files_size': 0, 'players_size': 0}
+        for path in self._all_paths():
+            open(path, 'wb').close()
+        # Append in batches so compiling a large history never holds all of its games
+        games = iter(games)
+        batch = list(islice(games, REWRITE_BATCH_SIZE))
+        while batch:
+            meta = self._append(meta, batch)
+            batch = list(islice(games, REWRITE_BATCH_SIZE))
+        self._save_meta(meta)
+
+    def append(self, games):
+        """Add games to an existing dataset
+
+        Args:
+            games (list): (filename, game_data, timestamp) tuples
+
+        Returns:
+            False if there is no dataset to add to
+        """
+        meta = self.load_meta()
+        if meta is None:
+            return False
+        self._truncate(meta)
+        self._save_meta(self._append(meta, games))
+        return True
+
+    def _all_paths(self):
+        paths = [self.column_path('marks', name) for name, _ in MARK_COLUMNS]
+        paths += [self.column_path('games', name) for name, _ in GAME_COLUMNS]
+        return paths + [self.files_path, self.players_path]
+
+    def _truncate(self, meta):
+        """Cut off rows an interrupted append wrote after the last saved meta"""
+        for table, columns in (('marks', MARK_COLUMNS), ('games', GAME_COLUMNS)):
+            for name, typecode in columns:
+                with open(self.column_path(table, name), 'r+b') as f:
+                    f.truncate(meta[table] * array(typecode).itemsize)
+        for path, size in ((self.files_path, meta['files_size']), (self.players_path, meta['players_size'])):
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+
+    def _append(self, meta, games):
+        """Write the columns of games after the rows counted in meta and return the new counts"""
+        player_ids = {name: i for i, name in enumerate(self.player_names(meta))}
+        new_players = []
+        marks = {name: array(typecode) for name, typecode in MARK_COLUMNS}
+        game_columns = {name: array(typecode) for name, typecode in GAME_COLUMNS}
+        mark_count = meta['marks']
+        game_id = meta['games']
+        filenames = []
+
+        for filename, game_data, timestamp in games:
+            try:
+                players = [player['name'] for player in game_data['players']]
+                settings = game_data['settings']
+                winner = game_data.get('winner')
+                history = game_data['history']
+                row = {
+                    'timestamp': int(timestamp.strftime('%Y%m%d%H%M%S')),
+                    'winner': winner['id'] if winner else -1,
+                    'score1': game_data['players'][0]['score'],
+                    'score2': game_data['players'][1]['score'],
+                    'mpr1': game_data['players'][0]['mpr'],
+                    'mpr2': game_data['players'][1]['mpr'],
+                    'highest_sector': settings['highest_sector'],
+                    'lowest_sector': settings['lowest_sector'],
+                    'bull_points': settings['bull_points'],
+                    'rounds': int((len(history) + 1) / 2),
+                    'first_mark': mark_count,
+                }
+                game_marks = [(turn, mark['player'], encode_sector(mark['sector']), bool(mark['was_scoring']), mark['points'])
+                              for turn, round_marks in enumerate(history) for mark in round_marks]
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue  # Skip games without the usual layout, e.g. hand-edited legacy files
+
+            for i, name in enumerate(players[:2]):
+                if name not in player_ids:
+                    player_ids[name] = len(player_ids)
+                    new_players.append(name)
+                row[f'player{i + 1}'] = player_ids[name]
+            for name, column in game_columns.items():
+                column.append(row[name])
+
+            for turn, player, sector, scoring, points in game_marks:
+                marks['game'].append(game_id)
+                marks['turn'].append(turn)
+                marks['player'].append(player)
+                marks['sector'].append(sector)
+                marks['scoring'].append(scoring)
+                marks['points'].append(points)
+            mark_count += len(game_marks)
+            filenames.append(filename)
+            game_id += 1
+
+        for table, columns in (('marks', marks), ('games', game_columns)):
+            for name, column in columns.items():
+                if sys.byteorder == 'big':
+                    column.byteswap()
+                with open(self.column_path(table, name), 'ab') as f:
+                    column.tofile(f)
+        with open(self.files_path, 'ab') as f:
+            f.write(''.join(name + '\n' for name in filenames).encode('utf-8'))
+        with open(self.players_path, 'ab') as f:
+            f.write(''.join(name + '\n' for name in new_players).encode('utf-8'))
+
+        # The text files are cut back to these sizes after an interrupted append
+        return {'version': MARK_DATASET_VERSION, 'games': game_id, 'marks': mark_count,
+                'players': meta['players'] + len(new_players),
+                'files_size': os.path.getsize(self.files_path),
+                'players_size': os.path.getsize(self.players_path)}
+
+    def _save_meta(self, meta):
+        """Write the row counts atomically, after the rows themselves"""
+        write_file_atomic(self.meta_path, json.dumps(meta).encode('utf-8'))
+
+    def _read_lines(self, path, count):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().split('\n')[:count]
+
+    def player_names(self, meta=None):
+        """Get the player names that the player1/player2 columns index"""
+        meta = meta or self.load_meta()
+        return self._read_lines(self.players_path, meta['players']) if meta else []
+
+    def filenames(self, meta=None):
+        """Get the game filenames, one per game row"""
+        meta = meta or self.load_meta()
+        return self._read_lines(self.files_path, meta['games']) if meta else []
+
+    def read_column(self, table, name, meta=None):
+        """Read one column of 'marks' or 'games' as an array
+
+        Returns:
+            array.array of the column's values, or None if there is no dataset
+        """
+        meta = meta or self.load_meta()
+        if meta is None:
+            return None
+        typecode = dict(MARK_COLUMNS if table == 'marks' else GAME_COLUMNS)[name]
+        column = array(typecode)
+        with open(self.column_path(table, name), 'rb') as f:
+            column.fromfile(f, meta[table])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        return column
+
+    def write_csv(self, path, progress=None):
+        """Write one CSV row per mark, with the columns of its game repeated on each row
+
+        Returns:
+            Number of marks written, or None if there is no dataset
+        """
+        meta = self.load_meta()
+        if meta is None:
+            return None
+        names = self.player_names(meta)
+        filenames = self.filenames(meta)
+        games = {name: self.read_column('games', name, meta) for name, _ in GAME_COLUMNS}
+        marks = {name: self.read_column('marks', name, meta) for name, _ in MARK_COLUMNS}
+
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['game', 'filename', 'timestamp', 'player1', 'player2', 'winner',
+                             'highest_sector', 'lowest_sector', 'bull_points',
+                             'turn', 'player', 'sector', 'scoring', 'points'])
+            for row in range(meta['marks']):
+                if progress and row % 10000 == 0:
+                    progress(row, meta['marks'])
+                game = marks['game'][row]
+                writer.writerow([
+                    game, filenames[game], games['timestamp'][game],
+                    names[games['player1'][game]], names[games['player2'][game]], games['winner'][game],
+                    games['highest_sector'][game], games['lowest_sector'][game], games['bull_points'][game],
+                    marks['turn'][row], marks['player'][row], decode_sector(marks['sector'][row]),
+                    marks['scoring'][row], marks['points'][row]
+                ])
+        return meta['marks']
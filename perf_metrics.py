@@ -0,0 +1,154 @@
+import os
+import json
+import threading
+import functools
+from time import perf_counter_ns
+from datetime import datetime
+
+# Histogram buckets are powers of two in microseconds: bucket i holds values below 2**i us
+HISTOGRAM_BUCKETS = 32
+
+
+class Histogram:
+    """Latency histogram with log2 buckets, cheap enough to feed on every tap"""
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, us):
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+        self.buckets[min(us.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, p):
+        """Upper bound in microseconds of the bucket holding the p-th percentile"""
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(1 << i, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean_us': self.total / self.count if self.count else 0,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'max_us': self.max,
+            'buckets': self.buckets,
+        }
+
+
+class Metrics:
+    """Opt-in counters and latency histograms
+
+    While disabled every instrumented call costs one attribute check, so the
+    hooks can stay in the hot paths of release builds. Recording is locked
+    because history I/O is timed on background threads.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.counters = {}
+        self.histograms = {}
+        self.started = None
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        """Start or stop recording; starting clears earlier results"""
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = datetime.now()
+
+    def count(self, name, n=1):
+        """Add n to a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, us):
+        """Add a latency in microseconds to a histogram"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(int(us))
+
+    def call(self, name, func, *args):
+        """Call func(*args), timing it if enabled"""
+        if not self.enabled:
+            return func(*args)
+        start = perf_counter_ns()
+        try:
+            return func(*args)
+        finally:
+            self.record(name, (perf_counter_ns() - start) // 1000)
+
+    def timed(self, name):
+        """Decorator timing every call of a function under name"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, (perf_counter_ns() - start) // 1000)
+            return wrapper
+        return decorate
+
+    def summary(self, name):
+        """Get the to_dict() of one histogram, or None if nothing was recorded"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            return histogram.to_dict() if histogram else None
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'started': self.started.isoformat(timespec='seconds') if self.started else None,
+                'dumped': datetime.now().isoformat(timespec='seconds'),
+                'counters': dict(self.counters),
+                'histograms': {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+            }
+
+    def dump(self, directory):
+        """Write everything recorded so far to a timestamped JSON file in directory
+
+        Returns:
+            tuple: (file path, error message)
+        """
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"perf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            with open(path, 'w') as f:
+                json.dump(self.to_dict(), f, indent=2)
+            return path, None
+        except OSError as e:
+            return None, str(e)
+
+
+# Shared by the app and the history layer; enabled from the app
+metrics = Metrics()
@@ -0,0 +1,262 @@
+import os
+import json
+import math
+from atomic_file import write_file_atomic
+
+# Bump when the layout of the persisted index changes; older indexes are rebuilt
+STATS_INDEX_VERSION = 2
+
+
+def new_player_stats():
+    """Create an empty stats entry for one player"""
+    return {
+        'games_played': 0,
+        'games_won': 0,
+        'total_rounds': 0,
+        'min_rounds': float('inf'),
+        'max_rounds': 0,
+        'total_mpr': 0,
+        'mpr_partials': [],  # Exact sum of the MPRs, see add_exact
+        'min_mpr': float('inf'),
+        'max_mpr': 0,
+        'sector_hits': {},
+        'sector_games': {},  # Track games played per sector
+        'total_sector_hits': 0
+    }
+
+
+def add_exact(partials, x):
+    """Add x to a list of non-overlapping partial sums, keeping the sum exact
+
+    This is the summation math.fsum uses internally. An exact sum does not
+    depend on the order of the additions, so totals built per chunk and then
+    merged equal the ones built game by game, and subtracting a game undoes
+    its addition exactly.
+    """
+    i = 0
+    for y in partials:
+        if abs(x) < abs(y):
+            x, y = y, x
+        hi = x + y
+        lo = y - (hi - x)
+        if lo:
+            partials[i] = lo
+            i += 1
+        x = hi
+    partials[i:] = [x]
+
+
+def game_sector_hits(game_data):
+    """Count the marks of each player per sector in one pass over the history
+
+    Returns:
+        List of {sector: hits} dicts, one per player, in order of first hit
+    """
+    hits = [{} for _ in game_data['players']]
+    for round_marks in game_data['history']:
+        for mark in round_marks:
+            player_hits = hits[mark['player']]
+            player_hits[mark['sector']] = player_hits.get(mark['sector'], 0) + 1
+    return hits
+
+
+def stats_events(games):
+    """Turn parsed games into the stream of events the stats are built from
+
+    Each game yields ('game', [(name, mpr), ...], rounds, winner name), then
+    ('mark', player index, sector) for every mark, then ('end',). Only one
+    game is looked at at a time, so streaming files through here keeps
+    memory flat however long the history is.
+    """
+    for game_data in games:
+        winner = game_data.get('winner') or {}
+        players = [(player['name'], player['mpr']) for player in game_data['players']]
+        yield 'game', players, int((len(game_data['history']) + 1) / 2), winner.get('name')
+        for round_marks in game_data['history']:
+            for mark in round_marks:
+                yield 'mark', mark['player'], mark['sector']
+        yield ('end',)
+
+
+def aggregate_player_stats(events, player_stats=None):
+    """Fold a stream of stats_events into the per-player stats dictionary
+
+    Memory grows with the number of players and sectors, never with the
+    number of games.
+
+    Returns:
+        player_stats, or a new dictionary if none was given
+    """
+    if player_stats is None:
+        player_stats = {}
+    game_stats = []
+    game_sectors = []
+    for event in events:
+        kind = event[0]
+        if kind == 'mark':
+            _, player_idx, sector = event
+            stats = game_stats[player_idx]
+            if sector not in stats['sector_hits']:
+                stats['sector_hits'][sector] = 0
+                stats['sector_games'][sector] = 0
+            stats['sector_hits'][sector] += 1
+            stats['total_sector_hits'] += 1
+            game_sectors[player_idx].add(sector)
+        elif kind == 'game':
+            _, players, rounds, winner = event
+            game_stats = []
+            for name, mpr in players:
+                if name not in player_stats:
+                    player_stats[name] = new_player_stats()
+
+                stats = player_stats[name]
+                stats['games_played'] += 1
+
+                stats['total_rounds'] += rounds
+                stats['min_rounds'] = min(stats['min_rounds'], rounds)
+                stats['max_rounds'] = max(stats['max_rounds'], rounds)
+
+                add_exact(stats['mpr_partials'], mpr)
+                stats['total_mpr'] = math.fsum(stats['mpr_partials'])
+                stats['min_mpr'] = min(stats['min_mpr'], mpr)
+                stats['max_mpr'] = max(stats['max_mpr'], mpr)
+
+                if winner == name:
+                    stats['games_won'] += 1
+                game_stats.append(stats)
+            game_sectors = [set() for _ in players]
+        else:
+            # Track games played per sector once the game's marks are counted
+            for stats, sectors in zip(game_stats, game_sectors):
+                for sector in sectors:
+                    stats['sector_games'][sector] += 1
+    return player_stats
+
+
+def add_game_stats(player_stats, game_data):
+    """Fold one completed game into the per-player stats dictionary"""
+    aggregate_player_stats(stats_events([game_data]), player_stats)
+
+
+def remove_game_stats(player_stats, game_data):
+    """Subtract one game from the per-player stats dictionary
+
+    Totals and counters are exact, but min/max values cannot be rolled back.
+    Returns False when the removed game held a min or max value, meaning the
+    stats must be rebuilt from the history files.
+    """
+    rounds = int((len(game_data['history']) + 1) / 2)
+    winner = game_data.get('winner') or {}
+    sector_hits = game_sector_hits(game_data)
+    exact = True
+
+    for player_idx, player in enumerate(game_data['players']):
+        name = player['name']
+        stats = player_stats.get(name)
+        if stats is None:
+            return False
+
+        stats['games_played'] -= 1
+        stats['total_rounds'] -= rounds
+        add_exact(stats['mpr_partials'], -player['mpr'])
+        stats['total_mpr'] = math.fsum(stats['mpr_partials'])
+        if rounds in (stats['min_rounds'], stats['max_rounds']):
+            exact = False
+        if player['mpr'] in (stats['min_mpr'], stats['max_mpr']):
+            exact = False
+
+        for sector, hits in sector_hits[player_idx].items():
+            if sector not in stats['sector_hits']:
+                continue
+            stats['sector_hits'][sector] -= hits
+            stats['sector_games'][sector] -= 1
+            stats['total_sector_hits'] -= hits
+            if stats['sector_games'][sector] <= 0:
+                del stats['sector_games'][sector]
+                del stats['sector_hits'][sector]
+
+        if winner.get('name') == name:
+            stats['games_won'] -= 1
+
+        if stats['games_played'] <= 0:
+            del player_stats[name]
+
+    return exact
+
+
+def merge_player_stats(player_stats, other):
+    """Fold the stats of another set of games into player_stats
+
+    Merging is associative, so stats built per file or per chunk, possibly in
+    parallel, can be combined in any grouping. Merging the parts in the order
+    of their games gives exactly the stats of adding the games one by one,
+    down to the order of players and sectors.
+
+    Returns:
+        player_stats, updated in place
+    """
+    for name, part in other.items():
+        stats = player_stats.get(name)
+        if stats is None:
+            stats = player_stats[name] = new_player_stats()
+        for key in ('games_played', 'games_won', 'total_rounds', 'total_sector_hits'):
+            stats[key] += part[key]
+        for key in ('min_rounds', 'min_mpr'):
+            stats[key] = min(stats[key], part[key])
+        for key in ('max_rounds', 'max_mpr'):
+            stats[key] = max(stats[key], part[key])
+        for y in part['mpr_partials']:
+            add_exact(stats['mpr_partials'], y)
+        stats['total_mpr'] = math.fsum(stats['mpr_partials'])
+        for sector, hits in part['sector_hits'].items():
+            stats['sector_hits'][sector] = stats['sector_hits'].get(sector, 0) + hits
+            stats['sector_games'][sector] = stats['sector_games'].get(sector, 0) + part['sector_games'][sector]
+    return player_stats
+
+
+def summarize_player_stats(player_stats):
+    """Add averages, win rate and most/least hit sectors to each player's stats"""
+    for name, stats in player_stats.items():
+        if stats['games_played'] > 0:
+            stats['avg_rounds'] = stats['total_rounds'] / stats['games_played']
+            stats['avg_mpr'] = stats['total_mpr'] / stats['games_played']
+            stats['win_rate'] = stats['games_won'] / stats['games_played'] * 100
+
+            # Calculate average hits per game for each sector
+            stats['sector_avgs'] = {}
+            for sector in stats['sector_hits']:
+                if stats['sector_games'][sector] > 0:
+                    stats['sector_avgs'][sector] = stats['sector_hits'][sector] / stats['sector_games'][sector]
+
+            # Find most and least hit sectors
+            if stats['sector_hits']:
+                stats['most_hit_sector'] = max(stats['sector_hits'].items(), key=lambda x: x[1])[0]
+                stats['least_hit_sector'] = min(stats['sector_hits'].items(), key=lambda x: x[1])[0]
+    return player_stats
+
+
+class PlayerStatsIndex:
+    """Persisted per-player aggregates, updated as games are saved and deleted"""
+
+    def __init__(self, index_dir):
+        self.path = os.path.join(index_dir, 'player_stats.json')
+
+    def load(self):
+        """Return the stored stats, or None if the index is missing or outdated"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != STATS_INDEX_VERSION:
+            return None
+        return data['players']
+
+    def save(self, player_stats):
+        """Write the stats atomically so a crash never leaves a half-written index"""
+        write_file_atomic(self.path, json.dumps({'version': STATS_INDEX_VERSION, 'players': player_stats}).encode('utf-8'))
+
+    def invalidate(self):
+        """Drop the index so the next read rebuilds it from the history files"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,274 @@
+"""Benchmarks for the rules engine and the history layer
+
+Plays synthetic games through CricketGame, timing every engine call, and
+times GameHistory on synthetic history directories of several sizes.
+Reports ops/sec and latency percentiles, and compares them with a stored
+baseline so slowdowns show up as regressions. Also reports the peak memory
+of a player stats rebuild, which should not grow with the history size and
+can be capped with --max-stats-memory. Runs headless.
+
+Generated history directories are kept in the work directory and reused by
+later runs with the same size.
+
+Usage:
+    python tools/benchmark.py
+    python tools/benchmark.py --sizes 100 1000 --save-baseline
+    python tools/benchmark.py --baseline tools/benchmark_baseline.json --tolerance 0.2
+    python tools/benchmark.py --sizes 100000 --max-stats-memory 2048
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_history import GameHistory, player_stats_summary
+import generate_history
+from generate_history import roster, play_game
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+DEFAULT_WORKDIR = os.path.join(tempfile.gettempdir(), 'window_cricket_bench')
+
+# Bump when generated games change, so cached history directories are rebuilt
+DATASET_VERSION = 2
+
+PLAYERS = roster(20)
+
+class Timings:
+    """Latencies of one benchmarked operation"""
+
+    def __init__(self):
+        self.samples = []
+
+    def time(self, func, *args):
+        start = time.perf_counter_ns()
+        result = func(*args)
+        self.samples.append(time.perf_counter_ns() - start)
+        return result
+
+    def summary(self):
+        samples = sorted(self.samples)
+        total = sum(samples)
+
+        def percentile(p):
+            return samples[min(len(samples) - 1, int(p / 100 * len(samples)))] / 1000
+
+        return {
+            'count': len(samples),
+            'ops_per_sec': len(samples) / (total / 1e9) if total else 0.0,
+            'p50_us': percentile(50),
+            'p90_us': percentile(90),
+            'p99_us': percentile(99),
+            'max_us': samples[-1] / 1000,
+        }
+
+
+def build_history_dir(path, count, seed):
+    """Fill a directory with count synthetic completed binary games"""
+    generate_history.generate(path, count, {
+        'players': len(PLAYERS),
+        'aborted': 0.0,
+        'legacy': 0.0,
+        'format': 'binary',
+        'start': '2024-01-01',
+        'seed': seed,
+    })
+
+
+def history_dir(workdir, count, seed):
+    """Get a synthetic history directory with count games, generating it if needed"""
+    path = os.path.join(workdir, f'history_{count}')
+    marker = os.path.join(path, 'bench_dataset.marker')
+    expected = {'version': DATASET_VERSION, 'count': count, 'seed': seed}
+    try:
+        with open(marker) as f:
+            if json.load(f) == expected:
+                return path
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(path, ignore_errors=True)
+    print(f"Generating {count} games in {path}...", flush=True)
+    build_history_dir(path, count, seed)
+    with open(marker, 'w') as f:
+        json.dump(expected, f)
+    return path
+
+
+def bench_engine(games, seed):
+    """Time every engine call while playing synthetic games"""
+    names = ['add_hit', 'undo_last_mark', 'undo_last_throw', 'switch_player', 'check_game_over']
+    timings = {name: Timings() for name in names}
+    rng = random.Random(seed)
+
+    def call(name, func, *args):
+        return timings[name].time(func, *args)
+
+    for _ in range(games):
+        play_game(rng, PLAYERS, call)
+    return {f'engine.{name}': timings[name].summary() for name in names}
+
+
+def bench_history(path, count, samples, seed):
+    """Time GameHistory operations on a history directory
+
+    Returns:
+        Tuple of (timing results, peak memory figures in KiB)
+    """
+    results = {}
+    rng = random.Random(seed)
+
+    # Listing: rebuilding the catalog, reading it in a new instance, and the cached list
+    shutil.rmtree(os.path.join(path, 'index'), ignore_errors=True)
+    timing = Timings()
+    timing.time(GameHistory(path).get_history_files)
+    results['history.get_history_files.rebuild'] = timing.summary()
+    timing = Timings()
+    for _ in range(5):
+        timing.time(GameHistory(path).get_history_files)
+    results['history.get_history_files.cold'] = timing.summary()
+    history = GameHistory(path)
+    history.get_history_files()
+    timing = Timings()
+    for _ in range(samples):
+        timing.time(history.get_history_files)
+    results['history.get_history_files.warm'] = timing.summary()
+
+    files = history.get_history_files()
+    timing = Timings()
+    for f in rng.sample(files, min(samples, len(files))):
+        timing.time(history.load_game, f)
+    results['history.load_game'] = timing.summary()
+
+    # Player stats as the stats screen loads them: first rebuilding the index, then from it
+    history.stats_index.invalidate()
+    timing = Timings()
+    timing.time(player_stats_summary, path)
+    results['stats.load_player_stats.rebuild'] = timing.summary()
+    timing = Timings()
+    for _ in range(5):
+        timing.time(player_stats_summary, path)
+    results['stats.load_player_stats.indexed'] = timing.summary()
+
+    # Peak Python heap of a stats rebuild, which should stay flat however many games there are
+    tracemalloc.start()
+    history.rebuild_player_stats()
+    memory = {f'stats.rebuild_player_stats.peak_kib@{count}': tracemalloc.get_traced_memory()[1] / 1024}
+    tracemalloc.stop()
+
+    # Saving updates the catalog and stats index; the saved games are deleted again afterwards
+    timing = Timings()
+    saved = []
+    while len(saved) < min(samples, 100):
+        game = play_game(rng, PLAYERS)
+        if game is None:
+            continue
+        # Unique names keep the timestamped filenames from colliding within a minute
+        game.players[0].name = f'Bench{len(saved)}'
+        filepath, error = timing.time(history.save_game, game)
+        if error:
+            raise RuntimeError(error)
+        saved.append(os.path.basename(filepath))
+    results['history.save_game'] = timing.summary()
+    for f in saved:
+        history.delete_game(f)
+
+    return {f'{name}@{count}': result for name, result in results.items()}, memory
+
+
+def compare(results, baseline, tolerance):
+    """Print each result against the baseline
+
+    Returns:
+        Number of results that got slower by more than the tolerance
+    """
+    regressions = 0
+    print(f"{'benchmark':<44} {'ops/s':>12} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'vs base':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = ''
+        if base and base['ops_per_sec']:
+            ratio = result['ops_per_sec'] / base['ops_per_sec']
+            change = f"{ratio:.2f}x"
+            if ratio < 1 - tolerance:
+                change += ' SLOW'
+                regressions += 1
+        print(f"{name:<44} {result['ops_per_sec']:>12,.0f} {result['p50_us']:>9.1f} "
+              f"{result['p90_us']:>9.1f} {result['p99_us']:>9.1f} {change:>8}")
+    return regressions
+
+
+def compare_memory(memory, baseline, tolerance, limit=None):
+    """Print each peak memory figure against the baseline and the limit
+
+    Returns:
+        Number of figures that grew by more than the tolerance or exceed the limit
+    """
+    regressions = 0
+    print(f"{'memory':<44} {'peak KiB':>12} {'vs base':>8}")
+    for name, kib in memory.items():
+        base = baseline.get(name)
+        change = f"{kib / base:.2f}x" if base else ''
+        if (base and kib > base * (1 + tolerance)) or (limit and kib > limit):
+            change += ' BIG'
+            regressions += 1
+        print(f"{name:<44} {kib:>12,.0f} {change:>8}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[100, 1000, 10000, 100000],
+                        help='history directory sizes in games (default: 100 1000 10000 100000)')
+    parser.add_argument('--engine-games', type=int, default=2000, help='games played for the engine benchmark')
+    parser.add_argument('--samples', type=int, default=1000, help='calls timed per history operation')
+    parser.add_argument('--workdir', default=DEFAULT_WORKDIR, help='where generated history directories are kept')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline results to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='ops/sec drop against the baseline that counts as a regression (default: 0.2)')
+    parser.add_argument('--max-stats-memory', type=float, default=None,
+                        help='fail if a stats rebuild peaks above this many KiB of Python heap')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = bench_engine(args.engine_games, args.seed)
+    memory = {}
+    for count in args.sizes:
+        path = history_dir(args.workdir, count, args.seed)
+        timings, peaks = bench_history(path, count, args.samples, args.seed)
+        results.update(timings)
+        memory.update(peaks)
+
+    try:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored['results']
+        baseline_memory = stored.get('memory', {})
+    except (OSError, ValueError, KeyError):
+        baseline = baseline_memory = {}
+    regressions = compare(results, baseline, args.tolerance)
+    regressions += compare_memory(memory, baseline_memory, args.tolerance, args.max_stats_memory)
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'results': results, 'memory': memory},
+                      f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{regressions} benchmarks are more than {args.tolerance:.0%} slower or bigger than the baseline")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Compile the history into the columnar mark dataset and export it
+
+The dataset lives in index/mark_dataset of the history directory, one raw
+little-endian file per column, and is kept up to date by the app as games
+are saved. This compiles it if it is missing (or always with --rebuild) and
+can write it out as CSV or as one NumPy .npz archive.
+
+Reading columns directly in a notebook:
+    meta = json.load(open(f'{dataset}/meta.json'))
+    points = np.fromfile(f'{dataset}/marks_points.u1', dtype='u1', count=meta['marks'])
+
+Usage:
+    python tools/export_marks.py --dir /path/to/history
+    python tools/export_marks.py --csv marks.csv --npz marks.npz
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_history import GameHistory
+from mark_dataset import MARK_COLUMNS, GAME_COLUMNS
+
+
+def write_npz(dataset, path):
+    """Write every column to an .npz archive as marks_<name> and games_<name> arrays"""
+    import numpy as np
+
+    meta = dataset.load_meta()
+    arrays = {}
+    for table, columns in (('marks', MARK_COLUMNS), ('games', GAME_COLUMNS)):
+        for name, _ in columns:
+            arrays[f'{table}_{name}'] = np.asarray(dataset.read_column(table, name, meta))
+    arrays['player_names'] = np.array(dataset.player_names(meta))
+    arrays['filenames'] = np.array(dataset.filenames(meta))
+    np.savez_compressed(path, **arrays)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default=None, help='history directory (default: the app\'s own)')
+    parser.add_argument('--rebuild', action='store_true', help='compile the dataset again from the game files')
+    parser.add_argument('--csv', help='write one row per mark to this CSV file')
+    parser.add_argument('--npz', help='write all columns to this NumPy .npz file')
+    args = parser.parse_args()
+
+    history = GameHistory(args.dir)
+    start = time.perf_counter()
+    if args.rebuild:
+        history.compile_mark_dataset()
+        dataset = history.mark_dataset
+    else:
+        dataset = history.get_mark_dataset()
+    meta = dataset.load_meta()
+    print(f"{meta['marks']} marks of {meta['games']} games in {dataset.dir} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    if args.csv:
+        dataset.write_csv(args.csv)
+        print(f"Wrote {args.csv}")
+    if args.npz:
+        write_npz(dataset, args.npz)
+        print(f"Wrote {args.npz}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""Generate a synthetic game history for load testing
+
+Plays N games through the real CricketGame rules, across every sector
+window and both Bull modes, between players of a league roster, and writes
+them straight into the GameHistory directory layout. A configurable share
+of the games are aborted mid-match or written as legacy .txt files. Games
+are played one league night after another, so every file gets its own
+timestamp. Work is split across a process pool.
+
+The catalog and stats indexes are left for the app to rebuild, unless
+--build-indexes is given.
+
+Usage:
+    python tools/generate_history.py --dir /tmp/history --games 100000
+    python tools/generate_history.py --dir /tmp/history --games 5000 --aborted 0.1 --legacy 0.05 --format json
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from bisect import bisect
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cricket_engine import CricketGame
+from game_history import GameHistory, GAME_CODECS, encode_game_data, game_to_data, game_filename_base
+
+FIRST_NAMES = ['Alice', 'Bob', 'Carol', 'Dave', 'Erin', 'Frank', 'Grace', 'Heidi', 'Ivan', 'Judy',
+               'Mallory', 'Niaj', 'Olivia', 'Peggy', 'Rupert', 'Sybil', 'Trent', 'Victor', 'Walter', 'Zoe',
+               'Anna', 'Ben', 'Chloe', 'Dan', 'Ella', 'Finn', 'Gina', 'Hugo', 'Iris', 'Jack',
+               'Kate', 'Liam', 'Mia', 'Noah', 'Omar', 'Pia', 'Quinn', 'Rosa', 'Sam', 'Tara']
+
+# Chance of up to no, one and two marks per dart; the rest are triples
+DART_CUMULATIVE = [0.40, 0.80, 0.92]
+UNDO_MARK_CHANCE = 0.02
+UNDO_THROW_CHANCE = 0.01
+MAX_ROUNDS = 100
+
+# League nights: weekdays (Monday is 0), first game, minutes between games and games per night
+LEAGUE_DAYS = (1, 3)
+NIGHT_START_HOUR = 19
+GAME_MINUTES = 6
+GAMES_PER_NIGHT = 40
+
+# Games handed to a worker process at a time
+CHUNK_SIZE = 500
+
+
+def roster(size):
+    """Get size distinct player names"""
+    names = list(FIRST_NAMES)
+    suffix = 2
+    while len(names) < size:
+        names.extend(f'{name}{suffix}' for name in FIRST_NAMES)
+        suffix += 1
+    return names[:size]
+
+
+def new_game(rng, players):
+    """Start a game between two roster players on a random sector window and Bull mode"""
+    highest_sector = rng.randint(6, 20)
+    player1, player2 = rng.sample(players, 2)
+    return CricketGame(player1, player2, highest_sector, highest_sector - 5, rng.choice([25, highest_sector + 5]))
+
+
+def play_round(game, rng, call=None):
+    """Throw three darts for the current player at one sector still worth hitting
+
+    Args:
+        call: Optional function called as call(name, method, *args) for every
+              game method, e.g. to time it; by default methods are called directly
+    """
+    current = game.players[game.current_player].sectors
+    opponent = game.players[1 - game.current_player].sectors
+    # Close own sectors first, then score on sectors the opponent has not closed
+    targets = [s for s in current if current[s] < 3] or [s for s in current if opponent[s] < 3]
+    target = rng.choice(targets) if targets else None
+    for _ in range(3 if target else 0):
+        marks = bisect(DART_CUMULATIVE, rng.random())
+        for _ in range(marks):
+            if call:
+                call('add_hit', game.add_hit, target)
+            else:
+                game.add_hit(target)
+        if rng.random() < UNDO_MARK_CHANCE:
+            if call:
+                call('undo_last_mark', game.undo_last_mark)
+            else:
+                game.undo_last_mark()
+    if rng.random() < UNDO_THROW_CHANCE:
+        if call:
+            call('undo_last_throw', game.undo_last_throw)
+        else:
+            game.undo_last_throw()
+        return
+    if call:
+        call('switch_player', game.switch_player)
+        call('check_game_over', game.check_game_over)
+    else:
+        game.switch_player()
+        game.check_game_over()
+
+
+def play_game(rng, players, call=None, stop_round=None):
+    """Play one synthetic game
+
+    Args:
+        stop_round (int): Abort the game after this many rounds, or None to play it out
+
+    Returns:
+        The game, or None if it ran too long or ended in a draw
+    """
+    game = new_game(rng, players)
+    for round_count in range(MAX_ROUNDS * 2):
+        if stop_round is not None and round_count >= stop_round:
+            return game
+        play_round(game, rng, call)
+        if game.game_over:
+            try:
+                game.get_winner_index()
+            except ValueError:
+                return None
+            return game
+    return None
+
+
+def game_timestamp(index, start):
+    """Timestamp of the index-th game: GAMES_PER_NIGHT games on each league night from start"""
+    night, slot = divmod(index, GAMES_PER_NIGHT)
+    weeks, day = divmod(night, len(LEAGUE_DAYS))
+    date = start + timedelta(weeks=weeks)
+    date += timedelta(days=(LEAGUE_DAYS[day] - date.weekday()) % 7)
+    return date.replace(hour=NIGHT_START_HOUR) + timedelta(minutes=slot * GAME_MINUTES)
+
+
+def generate_chunk(base_dir, first, count, options):
+    """Write games first to first + count - 1, each from its own seeded random generator
+
+    Returns:
+        Dict counting the completed, aborted and legacy games written
+    """
+    players = roster(options['players'])
+    start = datetime.strptime(options['start'], '%Y-%m-%d')
+    written = {'completed': 0, 'aborted': 0, 'legacy': 0}
+    for index in range(first, first + count):
+        # Seeding per game keeps the output independent of the number of workers
+        rng = random.Random(options['seed'] * 1000003 + index)
+        kind = rng.random()
+        if kind < options['aborted']:
+            kind = 'aborted'
+            stop_round = rng.randint(1, 30)
+        else:
+            kind = 'legacy' if kind < options['aborted'] + options['legacy'] else 'completed'
+            stop_round = None
+        game = None
+        while game is None:
+            game = play_game(rng, players, stop_round=stop_round)
+
+        # No winner for aborted games, even if the last round ended it
+        game_data = game_to_data(game, aborted=kind == 'aborted')
+        timestamp = game_timestamp(index, start).strftime('%Y%m%d_%H%M')
+        if kind == 'legacy':
+            # Early versions wrote 'player 1 vs player 2 on date'.txt files holding the same JSON
+            p1, p2 = game.players
+            filename = f"{p1.name} vs {p2.name} on {timestamp}.txt"
+            payload, _ = encode_game_data(game_data, 'json')
+        else:
+            payload, extension = encode_game_data(game_data, options['format'])
+            filename = game_filename_base(game, timestamp, aborted=kind == 'aborted') + extension
+
+        with open(os.path.join(base_dir, filename), 'wb') as f:
+            f.write(payload)
+        written[kind] += 1
+    return written
+
+
+def generate(base_dir, games, options, workers=None):
+    """Write games into base_dir in chunks spread over a process pool
+
+    Args:
+        options (dict): players, aborted, legacy, format, start and seed, as taken by generate_chunk
+        workers (int): Worker processes, None for the CPU count
+
+    Returns:
+        Dict counting the completed, aborted and legacy games written
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    totals = {'completed': 0, 'aborted': 0, 'legacy': 0}
+    chunks = [(first, min(CHUNK_SIZE, games - first)) for first in range(0, games, CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(generate_chunk, base_dir, first, count, options) for first, count in chunks]
+        for future in futures:
+            for kind, count in future.result().items():
+                totals[kind] += count
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', required=True, help='history directory to write the games to')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--aborted', type=float, default=0.05, help='fraction of aborted games (default: 0.05)')
+    parser.add_argument('--legacy', type=float, default=0.02, help='fraction of legacy .txt games (default: 0.02)')
+    parser.add_argument('--players', type=int, default=24, help='players in the league roster')
+    parser.add_argument('--format', choices=list(GAME_CODECS), default=GameHistory.save_format,
+                        help='file format of the games that are not legacy')
+    parser.add_argument('--start', default='2022-01-04', help='date of the first league night, YYYY-MM-DD')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--build-indexes', action='store_true', help='build the catalog and stats indexes afterwards')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    options = {
+        'players': args.players,
+        'aborted': args.aborted,
+        'legacy': args.legacy,
+        'format': args.format,
+        'start': args.start,
+        'seed': args.seed,
+    }
+
+    start = time.perf_counter()
+    totals = generate(args.dir, args.games, options, args.workers)
+    print(f"Wrote {sum(totals.values())} games to {args.dir} in {time.perf_counter() - start:.1f}s: "
+          f"{totals['completed']} completed, {totals['aborted']} aborted, {totals['legacy']} legacy")
+
+    if args.build_indexes:
+        start = time.perf_counter()
+        history = GameHistory(args.dir)
+        history.rebuild_catalog()
+        history.rebuild_player_stats()
+        print(f"Built indexes in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
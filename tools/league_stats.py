@@ -0,0 +1,50 @@
+"""League report: player stats over a whole history archive
+
+Aggregates the games per chunk of files across a process pool and merges
+the partial stats, which gives the same numbers as the app's stats screen.
+The app's own stats index is left untouched.
+
+Usage:
+    python tools/league_stats.py --dir /path/to/history
+    python tools/league_stats.py --dir /path/to/history --workers 8 --json report.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_history import GameHistory, compute_player_stats
+from player_stats import summarize_player_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default=None, help='history directory (default: the app\'s own)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: CPU count)')
+    parser.add_argument('--json', help='also write the full stats to this JSON file')
+    args = parser.parse_args()
+
+    history = GameHistory(args.dir)
+    files = history.get_history_files()
+    start = time.perf_counter()
+    player_stats = summarize_player_stats(compute_player_stats(history.base_dir, files, args.workers))
+    elapsed = time.perf_counter() - start
+
+    print(f"{'player':<20} {'games':>7} {'won':>7} {'win %':>7} {'avg MPR':>8} {'avg rounds':>11}")
+    ranking = sorted(player_stats.items(), key=lambda item: (-item[1]['win_rate'], item[0]))
+    for name, stats in ranking:
+        print(f"{name:<20} {stats['games_played']:>7} {stats['games_won']:>7} {stats['win_rate']:>7.1f} "
+              f"{stats['avg_mpr']:>8.2f} {stats['avg_rounds']:>11.1f}")
+    print(f"{len(files)} games of {len(player_stats)} players in {elapsed:.1f}s with {args.workers} workers")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(player_stats, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Monte Carlo balance check for sector windows and Bull values
+
+Plays many games at once between two skill models, holding the state of
+every game in NumPy arrays (one row per game, one column per sector) and
+advancing all games one dart at a time. Reports win rate, average rounds
+and MPR for each sector window and Bull setting.
+
+Usage:
+    python tools/simulate_windows.py --games 200000
+    python tools/simulate_windows.py --windows 20 11 6 --skill-a pro --skill-b league
+"""
+import argparse
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("The simulator needs NumPy: pip install -r tools/requirements.txt")
+
+# Dartboard order, used to find which sectors a miss can land in
+BOARD_ORDER = [20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5]
+
+# Columns 0-5 hold the window sectors from lowest to highest, column 6 the Bull
+BULL = 6
+SECTOR_COUNT = 7
+
+# Per-dart probabilities: triple, double and single when aiming at a sector,
+# double and single bull when aiming at the Bull, and a neighbour single on a miss
+SKILL_MODELS = {
+    'beginner': {'triple': 0.03, 'double': 0.05, 'single': 0.35, 'bull_double': 0.02, 'bull_single': 0.08, 'neighbour': 0.30},
+    'casual':   {'triple': 0.07, 'double': 0.07, 'single': 0.45, 'bull_double': 0.04, 'bull_single': 0.14, 'neighbour': 0.28},
+    'league':   {'triple': 0.15, 'double': 0.09, 'single': 0.50, 'bull_double': 0.08, 'bull_single': 0.24, 'neighbour': 0.20},
+    'pro':      {'triple': 0.35, 'double': 0.08, 'single': 0.45, 'bull_double': 0.18, 'bull_single': 0.40, 'neighbour': 0.10},
+}
+
+
+def expected_marks(skill):
+    """Expected marks per dart at a sector and at the Bull"""
+    sector = 3 * skill['triple'] + 2 * skill['double'] + skill['single']
+    bull = 2 * skill['bull_double'] + skill['bull_single']
+    return sector, bull
+
+
+def neighbour_columns(highest_sector):
+    """Get the window column of the left and right board neighbour of each sector, or -1"""
+    lowest_sector = highest_sector - 5
+    left = np.full(SECTOR_COUNT, -1, dtype=np.int64)
+    right = np.full(SECTOR_COUNT, -1, dtype=np.int64)
+    for column in range(6):
+        position = BOARD_ORDER.index(lowest_sector + column)
+        for side, array in ((-1, left), (1, right)):
+            neighbour = BOARD_ORDER[(position + side) % len(BOARD_ORDER)]
+            if lowest_sector <= neighbour <= highest_sector:
+                array[column] = neighbour - lowest_sector
+    return left, right
+
+
+def apply_marks(marks, scores, player, target, hits, values):
+    """Apply one dart's marks to every game, following CricketGame.add_hit
+
+    Marks up to three close the sector. Further marks score the sector value
+    while the opponent has not closed it and are rejected once both players
+    have closed it, exactly like repeated add_hit calls in the app.
+
+    Args:
+        marks: int array (games, 2, 7) of sector marks, updated in place
+        scores: int array (games, 2) of points, updated in place
+        player (int): Index of the throwing player
+        target: int array (games,) of hit columns
+        hits: int array (games,) of marks scored by the dart, 0 for a miss
+        values: int array (7,) of points per column
+    """
+    rows = np.arange(len(target))
+    current = marks[rows, player, target]
+    opponent = marks[rows, 1 - player, target]
+    closing = np.minimum(np.maximum(3 - current, 0), hits)
+    scoring = np.where(opponent < 3, hits - closing, 0)
+    marks[rows, player, target] = current + closing + scoring
+    scores[:, player] += scoring * values[target]
+
+
+def choose_targets(marks, scores, player, score_weights):
+    """Pick the column each game's thrower aims at
+
+    A player who is not ahead scores on the most valuable sector they have
+    opened and the opponent has not closed. Otherwise they close their
+    highest open sector, leaving the Bull for last.
+    """
+    own_closed = marks[:, player, :] >= 3
+    opponent_closed = marks[:, 1 - player, :] >= 3
+    not_ahead = scores[:, player] <= scores[:, 1 - player]
+
+    can_score = own_closed & ~opponent_closed
+    scoring_target = np.argmax(np.where(can_score, score_weights, -1.0), axis=1)
+
+    # Columns ordered highest sector first, then Bull
+    closing_order = np.array([5, 4, 3, 2, 1, 0, BULL])
+    closing_target = closing_order[np.argmax(~own_closed[:, closing_order], axis=1)]
+    all_closed = own_closed.all(axis=1)
+
+    use_scoring = can_score.any(axis=1) & (not_ahead | all_closed)
+    return np.where(use_scoring, scoring_target, closing_target)
+
+
+def throw_darts(rng, target, skill, left, right):
+    """Sample where each game's dart lands
+
+    Returns:
+        Tuple of (column, hits) arrays; hits is 0 for a complete miss
+    """
+    roll = rng.random(len(target))
+    at_bull = target == BULL
+
+    sector_hits = np.select(
+        [roll < skill['triple'],
+         roll < skill['triple'] + skill['double'],
+         roll < skill['triple'] + skill['double'] + skill['single']],
+        [3, 2, 1], 0)
+    bull_hits = np.select(
+        [roll < skill['bull_double'],
+         roll < skill['bull_double'] + skill['bull_single']],
+        [2, 1], 0)
+    hits = np.where(at_bull, bull_hits, sector_hits)
+
+    # A missed sector dart may still land as a single in a neighbouring window sector
+    column = target.copy()
+    missed = (hits == 0) & ~at_bull
+    # Whether a miss lands next door and on which side are independent draws
+    near = rng.random(len(target))
+    side = rng.random(len(target))
+    neighbour = np.where(side < 0.5, left[target], right[target])
+    lands_next = missed & (near < skill['neighbour']) & (neighbour >= 0)
+    column[lands_next] = neighbour[lands_next]
+    hits[lands_next] = 1
+    return column, hits
+
+
+def row_skills(a_in_slot, skill_a, skill_b):
+    """Per-game skill probabilities for the player in a slot"""
+    return {key: np.where(a_in_slot, skill_a[key], skill_b[key]) for key in skill_a}
+
+
+def simulate(games, highest_sector, bull_points, skill_a, skill_b, rng, max_rounds=60):
+    """Play a batch of games between skill models A and B
+
+    A throws first in half the games and B in the other half. Finished games
+    are dropped from the working arrays after every turn, so the long tail of
+    close games does not pay for the whole batch.
+
+    Returns:
+        dict with counts of A wins, B wins, first player wins, draws and
+        unfinished games, and
+        per finished game the rounds played and the MPR of A and B
+    """
+    lowest_sector = highest_sector - 5
+    values = np.array([lowest_sector + c for c in range(6)] + [bull_points], dtype=np.int64)
+    left, right = neighbour_columns(highest_sector)
+
+    weights = {}
+    for name, skill in (('a', skill_a), ('b', skill_b)):
+        sector_marks, bull_marks = expected_marks(skill)
+        weights[name] = values * np.array([sector_marks] * 6 + [bull_marks])
+
+    # Player slot 0 always throws first; a_slot tells which slot A sits in
+    a_slot = (np.arange(games) % 2).astype(np.int64)
+    marks = np.zeros((games, 2, SECTOR_COUNT), dtype=np.int64)
+    scores = np.zeros((games, 2), dtype=np.int64)
+
+    results = {'a_wins': 0, 'b_wins': 0, 'first_wins': 0, 'draws': 0, 'rounds': [], 'a_mpr': [], 'b_mpr': []}
+
+    for turn in range(2 * max_rounds):
+        if len(a_slot) == 0:
+            break
+        player = turn % 2
+        a_throws = a_slot == player
+        skill = row_skills(a_throws, skill_a, skill_b)
+        score_weights = np.where(a_throws[:, None], weights['a'], weights['b'])
+        for _ in range(3):
+            target = choose_targets(marks, scores, player, score_weights)
+            column, hits = throw_darts(rng, target, skill, left, right)
+            apply_marks(marks, scores, player, column, hits, values)
+
+        # Same test as CricketGame.check_game_over after switching players
+        closed = marks >= 3
+        top = scores.max(axis=1, keepdims=True)
+        done = (closed.all(axis=2) & (scores >= top)).any(axis=1)
+        if not done.any():
+            continue
+
+        # Winner by score, ties broken by closed sectors as in get_winner_index
+        m, sc, slot = marks[done], scores[done], a_slot[done]
+        closed_count = closed[done].sum(axis=2)
+        tied = sc[:, 0] == sc[:, 1]
+        slot0_wins = (sc[:, 0] > sc[:, 1]) | (tied & (closed_count[:, 0] > closed_count[:, 1]))
+        slot1_wins = (sc[:, 1] > sc[:, 0]) | (tied & (closed_count[:, 1] > closed_count[:, 0]))
+        a_wins = np.where(slot == 0, slot0_wins, slot1_wins)
+        b_wins = np.where(slot == 0, slot1_wins, slot0_wins)
+        results['a_wins'] += int(a_wins.sum())
+        results['b_wins'] += int(b_wins.sum())
+        results['first_wins'] += int(slot0_wins.sum())
+        results['draws'] += int((~slot0_wins & ~slot1_wins).sum())
+
+        # Counted marks per round actually thrown, including scoring marks. The MPR the app saves
+        # divides the incoming player's marks by one round more, the round they never threw
+        rows = np.arange(len(slot))
+        total_marks = m.sum(axis=2)
+        slot_rounds = np.array([turn // 2 + 1, (turn + 1) // 2])
+        results['rounds'].append(np.full(len(slot), turn // 2 + 1))
+        results['a_mpr'].append(total_marks[rows, slot] / slot_rounds[slot])
+        results['b_mpr'].append(total_marks[rows, 1 - slot] / slot_rounds[1 - slot])
+
+        keep = ~done
+        a_slot, marks, scores = a_slot[keep], marks[keep], scores[keep]
+
+    results['unfinished'] = len(a_slot)
+    for key in ('rounds', 'a_mpr', 'b_mpr'):
+        results[key] = np.concatenate(results[key]) if results[key] else np.zeros(0)
+    return results
+
+
+def run_setting(games, batch_size, highest_sector, bull_points, skill_a, skill_b, rng, max_rounds):
+    """Simulate one window/Bull setting in batches and summarise the results"""
+    totals = {'a_wins': 0, 'b_wins': 0, 'first_wins': 0, 'draws': 0, 'unfinished': 0}
+    rounds_sum = a_mpr_sum = b_mpr_sum = 0.0
+    finished = 0
+    remaining = games
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        result = simulate(size, highest_sector, bull_points, skill_a, skill_b, rng, max_rounds)
+        for key in totals:
+            totals[key] += result[key]
+        rounds_sum += result['rounds'].sum()
+        a_mpr_sum += result['a_mpr'].sum()
+        b_mpr_sum += result['b_mpr'].sum()
+        finished += len(result['rounds'])
+        remaining -= size
+
+    finished = max(finished, 1)
+    return {
+        'a_win_rate': totals['a_wins'] / games * 100,
+        'first_win_rate': totals['first_wins'] / games * 100,
+        'draw_rate': totals['draws'] / games * 100,
+        'unfinished_rate': totals['unfinished'] / games * 100,
+        'avg_rounds': rounds_sum / finished,
+        'a_mpr': a_mpr_sum / finished,
+        'b_mpr': b_mpr_sum / finished,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=100000, help='games per window and Bull setting')
+    parser.add_argument('--batch-size', type=int, default=50000, help='games simulated together in memory')
+    parser.add_argument('--windows', type=int, nargs='*', default=list(range(20, 5, -1)),
+                        help='highest sectors of the windows to simulate (default: 20 down to 6)')
+    parser.add_argument('--skill-a', choices=sorted(SKILL_MODELS), default='league')
+    parser.add_argument('--skill-b', choices=sorted(SKILL_MODELS), default='league')
+    parser.add_argument('--max-rounds', type=int, default=60, help='rounds before a game counts as unfinished')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    skill_a = SKILL_MODELS[args.skill_a]
+    skill_b = SKILL_MODELS[args.skill_b]
+
+    print(f"{args.games} games per setting, A={args.skill_a} vs B={args.skill_b}")
+    print(f"{'window':>8} {'bull':>5} {'A win%':>7} {'1st win%':>8} {'draw%':>6} {'unfin%':>7} {'rounds':>7} {'A MPR':>6} {'B MPR':>6}")
+    start = time.perf_counter()
+    for highest_sector in args.windows:
+        for bull_points in sorted({25, highest_sector + 5}):
+            summary = run_setting(args.games, args.batch_size, highest_sector, bull_points,
+                                  skill_a, skill_b, rng, args.max_rounds)
+            window = f"{highest_sector}-{highest_sector - 5}"
+            print(f"{window:>8} {bull_points:>5} {summary['a_win_rate']:>7.2f} {summary['first_win_rate']:>8.2f} {summary['draw_rate']:>6.2f} "
+                  f"{summary['unfinished_rate']:>7.2f} {summary['avg_rounds']:>7.2f} "
+                  f"{summary['a_mpr']:>6.2f} {summary['b_mpr']:>6.2f}")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Check saved games against the rules engine
+
+Replays every history file through CricketGame and compares the stored
+per-mark scoring, final scores, MPR and winner with what the rules compute.
+Files are validated in parallel across a process pool.
+
+Usage:
+    python tools/validate_history.py
+    python tools/validate_history.py --dir /path/to/history --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cricket_engine import replay_game
+from game_history import GameHistory
+
+MPR_TOLERANCE = 1e-6
+
+# One GameHistory per worker process, set up by init_worker
+_history = None
+
+
+def init_worker(base_dir):
+    global _history
+    _history = GameHistory(base_dir)
+
+
+def validate_game(game_data):
+    """Compare a saved game with its replay
+
+    Returns:
+        List of mismatch descriptions, empty if the game is consistent
+    """
+    problems = []
+    game, rejected = replay_game(game_data)
+    for round_idx, mark_idx in rejected:
+        problems.append(f"round {round_idx + 1} mark {mark_idx + 1}: rejected by the rules")
+
+    if not rejected:
+        for round_idx, (saved_round, replayed_round) in enumerate(zip(game_data['history'], game.mark_history)):
+            for mark_idx, (saved, replayed) in enumerate(zip(saved_round, replayed_round)):
+                for key in ('player', 'was_scoring', 'points'):
+                    if saved[key] != replayed[key]:
+                        problems.append(f"round {round_idx + 1} mark {mark_idx + 1}: {key} is {saved[key]}, rules give {replayed[key]}")
+
+    for idx, (saved, player) in enumerate(zip(game_data['players'], game.players)):
+        if saved['score'] != player.score:
+            problems.append(f"player {idx + 1} score is {saved['score']}, rules give {player.score}")
+        if abs(saved['mpr'] - player.mpr) > MPR_TOLERANCE:
+            problems.append(f"player {idx + 1} MPR is {saved['mpr']:.4f}, rules give {player.mpr:.4f}")
+
+    winner = game_data.get('winner')
+    if winner is not None:
+        if not game.game_over:
+            problems.append("game has a winner but the rules say it is not over")
+        else:
+            try:
+                winner_idx = game.get_winner_index()
+            except ValueError as e:
+                problems.append(f"winner is {winner['name']}, rules say: {e}")
+            else:
+                if winner['id'] != winner_idx or winner['name'] != game.players[winner_idx].name:
+                    problems.append(f"winner is {winner['name']}, rules give {game.players[winner_idx].name}")
+                if winner['score'] != game.players[winner_idx].score:
+                    problems.append(f"winner score is {winner['score']}, rules give {game.players[winner_idx].score}")
+    return problems
+
+
+def validate_file(filename):
+    """Validate one history file in a worker process
+
+    Returns:
+        Tuple of (filename, list of problems)
+    """
+    try:
+        game_data = _history.load_game(filename)
+    except (OSError, ValueError) as e:
+        return filename, [f"unreadable: {e}"]
+    try:
+        return filename, validate_game(game_data)
+    except (KeyError, TypeError, IndexError) as e:
+        return filename, [f"malformed game data: {e!r}"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default=None, help='history directory (default: the app directory)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--quiet', action='store_true', help='only print the summary')
+    args = parser.parse_args()
+
+    history = GameHistory(args.dir)
+    # Aborted games are saved mid-round without their last marks, so only completed games can be checked
+    files = history.get_history_files()
+
+    start = time.perf_counter()
+    bad = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(history.base_dir,)) as pool:
+        chunksize = max(1, len(files) // ((args.workers or os.cpu_count() or 1) * 8))
+        for filename, problems in pool.map(validate_file, files, chunksize=chunksize):
+            if problems:
+                bad += 1
+                if not args.quiet:
+                    print(filename)
+                    for problem in problems:
+                        print(f"    {problem}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Validated {len(files)} games in {elapsed:.1f}s: {len(files) - bad} consistent, {bad} with mismatches")
+    return 1 if bad else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())